@@ -1,54 +1,242 @@
 
-import os
-import requests
+import argparse
+import binascii
+import hashlib
+import io
 import json
-import base64
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+except ImportError:  # orjson が無い環境では標準の json にフォールバック
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    json_loads = json.loads
 
 # --- 設定 ---
-# APIのベースURL
-BASE_URL = "http://localhost:8000"
+# APIのベースURL（IPリテラルにして localhost の名前解決を省く）
+BASE_URL = "http://127.0.0.1:8000"
 # 出力先ディレクトリ
-OUTPUT_DIR = "operation_checks_output"
+OUTPUT_DIR = Path("operation_checks_output")
 # --- 設定ここまで ---
 
+RENDER_URL = f"{BASE_URL}/render"
+BATCH_URL = f"{BASE_URL}/render/batch"
+# /render チェックで共通のパラメータ（リクエストごとに展開してコピーする）
+BASE_RENDER_PAYLOAD = {"font_size": 22, "padding": 20}
+
 # No API token is required for internal usage. We keep a simple header set
 # and do not read any API_TOKEN environment variable.
-HEADERS = {"Content-Type": "application/json"}
+# Payloads are pre-encoded with json_dumps, so Content-Type is set here.
+# Responses are mostly Base64 PNG data, which does not compress, so we ask
+# for identity encoding and skip the decompression pass.
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept-Encoding": "identity",
+}
+
+# 各リクエストのタイムアウト（接続, 読み取り）秒。ハングで全体が止まらないようにする
+TIMEOUT = (2.0, 30.0)
+
+# 全チェックで1つのセッションを共有し、keep-alive で接続を使い回す
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+# 一時的なゲートウェイエラーのみ短いバックオフで再試行する。
+# レンダリングは冪等なので POST も再試行対象に含め、最終応答はそのまま返す
+RETRY = Retry(
+    total=2,
+    backoff_factor=0.1,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"GET", "POST"}),
+    raise_on_status=False,
+)
+SESSION.mount(
+    "http://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=RETRY),
+)
+
+# PNGのデコードと書き込みはバックグラウンドで行い、次のリクエストと重ねる
+IO_POOL = ThreadPoolExecutor(max_workers=4)
+# 投入した書き込み (保存先, Future)。完了後に結果を確認して成否を報告する
+PNG_WRITES = []
+
+# 前回実行時のETag（/render の条件付きリクエスト用）
+ETAG_FILE = OUTPUT_DIR / ".etags.json"
+ETAGS = {}
+# 条件付きリクエストを使うか（--use-etags）。既定では無効で、毎回サーバーに描画させる
+USE_ETAGS = False
+
+
+# ワーカースレッドごとの出力バッファ（並行実行中のチェック同士で出力が混ざらないようにする）
+_LOCAL = threading.local()
+
+
+def log(*args):
+    """チェック結果を出力する。バッファ設定中のスレッドではそこへ溜め、後でまとめて出す"""
+    buffer = getattr(_LOCAL, "buffer", None)
+    print(*args, file=buffer if buffer is not None else sys.stdout)
+
+
+def run_check_buffered(check, timestamp):
+    """チェックを実行し、その出力をまとめた文字列を返す"""
+    buffer = _LOCAL.buffer = io.StringIO()
+    try:
+        check(timestamp)
+    except Exception:
+        # 途中までの出力は失わないよう先に書き出す
+        sys.stdout.write(buffer.getvalue())
+        raise
+    finally:
+        _LOCAL.buffer = None
+    return buffer.getvalue()
+
+
+def load_etags():
+    """前回保存したETag一覧を読み込む（無ければ空）"""
+    try:
+        ETAGS.update(json.loads(ETAG_FILE.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        pass
+
+
+def store_etags():
+    """ETag一覧を次回実行用に保存する"""
+    ETAG_FILE.write_text(
+        json.dumps(ETAGS, indent=2, ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+
+def etag_key(endpoint_name, payload):
+    """エンドポイントとペイロードからETag一覧のキーを作る"""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.blake2b(canonical.encode("utf-8")).hexdigest()
+    return f"{endpoint_name}:{digest}"
+
+
+def conditional_post(url, payload, key):
+    """`--use-etags` 指定時のみ、前回のETagがあれば If-None-Match を付けてPOSTする
+
+    既定では常にレンダリングさせ、動作確認として意味のある結果を得る。
+    """
+    cached = ETAGS.get(key) if USE_ETAGS else None
+    headers = {"If-None-Match": cached["etag"]} if cached else None
+    return SESSION.post(
+        url, data=json_dumps(payload), headers=headers, timeout=TIMEOUT
+    )
+
+
+def remember_etag(key, response, json_path):
+    """200応答のETagと保存先を記録する（次回の304で再利用）"""
+    etag = response.headers.get("ETag")
+    if etag:
+        ETAGS[key] = {"etag": etag, "json": str(json_path)}
+
+
+# Linux では読み取り時刻の更新を抑止する（他OSでは 0 となり無効）
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_NOATIME", 0)
+
+
+def _fast_write(path, data):
+    """BufferedWriter を介さず os.write で一括書き込みする"""
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def _write_png(img_path, image_base64):
+    """Base64文字列をデコードしてPNGファイルへ書き込む（IO_POOL上で実行）"""
+    # a2b_base64 はASCII文字列を直接受け付け、中間のバイト列を作らない
+    img_data = binascii.a2b_base64(image_base64)
+    _fast_write(img_path, img_data)
+    # 画像1枚分だけを保持するよう、書き込み後すぐに参照を手放す
+    del img_data
+
+
+def submit_png_write(img_path, image_base64):
+    """PNGの書き込みを IO_POOL に投入し、結果確認用に記録する"""
+    PNG_WRITES.append((img_path, IO_POOL.submit(_write_png, img_path, image_base64)))
+
+
+def report_png_writes():
+    """投入済みの書き込みの成否を報告し、失敗件数を返す"""
+    failures = 0
+    for img_path, future in PNG_WRITES:
+        try:
+            future.result()
+        except (OSError, binascii.Error) as e:
+            failures += 1
+            print(f"❌ Failed to save PNG image to {img_path}: {e}")
+        else:
+            print(f"🖼️ Saved PNG image to {img_path}")
+    return failures
+
 
-def save_files(endpoint_name, timestamp, data, suffix=""):
-    """レスポンスのJSONと画像を保存する"""
-    # ファイル名のサフィックスを組み立て
-    filename_suffix = f"_{suffix}" if suffix else ""
+def _file_stem(endpoint_name, timestamp, suffix=""):
+    """保存ファイル名の共通部分（拡張子なし）"""
+    return f"{endpoint_name}_{timestamp}" + (f"_{suffix}" if suffix else "")
+
+
+def save_files(
+    endpoint_name, timestamp, data, response_bytes, suffix="", item_suffixes=None
+):
+    """レスポンスのJSONと画像を保存する
+
+    `data` は画像の取り出しに使うパース済みレスポンス、`response_bytes` は
+    サーバーが返したJSON本文のバイト列そのもの（デコードや再シリアライズを
+    せずにそのまま保存する）。`item_suffixes` を渡すと、バッチ結果の画像名に
+    連番の代わりに各サフィックスを使う。
+    """
+    stem = _file_stem(endpoint_name, timestamp, suffix)
 
     # JSONレスポンスを保存
-    json_filename = f"{OUTPUT_DIR}/{endpoint_name}_{timestamp}{filename_suffix}.json"
-    with open(json_filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"   📄 Saved JSON response to {json_filename}")
+    json_path = OUTPUT_DIR / f"{stem}.json"
+    _fast_write(json_path, response_bytes)
+    log(f"   📄 Saved JSON response to {json_path}")
 
     # 画像を保存
     if endpoint_name == 'render':
         if "image_base64" in data and data["image_base64"]:
-            img_data = base64.b64decode(data["image_base64"])
-            img_filename = f"{OUTPUT_DIR}/{endpoint_name}_{timestamp}{filename_suffix}.png"
-            with open(img_filename, 'wb') as f:
-                f.write(img_data)
-            print(f"   🖼️ Saved PNG image to {img_filename}")
+            img_path = OUTPUT_DIR / f"{stem}.png"
+            submit_png_write(img_path, data["image_base64"])
+            log(f"   🖼️ Queued PNG image: {img_path}")
     elif endpoint_name == 'batch':
         if "results" in data and isinstance(data["results"], list):
+            item_stem = _file_stem(endpoint_name, timestamp, "item")
             for i, result in enumerate(data["results"]):
                 if "image_base64" in result and result["image_base64"]:
-                    img_data = base64.b64decode(result["image_base64"])
-                    img_filename = f"{OUTPUT_DIR}/{endpoint_name}_{timestamp}_item_{i+1}.png"
-                    with open(img_filename, 'wb') as f:
-                        f.write(img_data)
-                    print(f"   🖼️ Saved PNG image for item {i+1} to {img_filename}")
+                    if item_suffixes:
+                        img_name = _file_stem(endpoint_name, timestamp, item_suffixes[i])
+                    else:
+                        img_name = f"{item_stem}_{i + 1}"
+                    img_path = OUTPUT_DIR / f"{img_name}.png"
+                    submit_png_write(img_path, result["image_base64"])
+                    log(f"   🖼️ Queued PNG image for item {i+1}: {img_path}")
+
+    return json_path
 
 
 def check_render_endpoint(timestamp):
     """/render エンドポイントの動作をチェックします。"""
-    print("Checking POST /render endpoint for various fonts...")
+    log("Checking POST /render endpoint for various fonts...")
 
     fonts_to_test = [
         ("antique", None),      # APIのデフォルトフォント（アンチック）
@@ -56,48 +244,62 @@ def check_render_endpoint(timestamp):
         ("mincho", "mincho")
     ]
 
-    for font_name_for_file, font_value_for_api in fonts_to_test:
-        print(f"  - Testing with font: {font_name_for_file}")
-        url = f"{BASE_URL}/render"
+    url = RENDER_URL
+
+    def run_font(font_item):
+        """1フォント分のPOSTを行い、(フォント名, レスポンスまたは例外) を返す"""
+        font_name_for_file, font_value_for_api = font_item
         payload = {
+            **BASE_RENDER_PAYLOAD,
             "text": f"これは{font_name_for_file}フォントのテストです。",
-            "font_size": 22,
-            "padding": 20
         }
         if font_value_for_api:
             payload["font"] = font_value_for_api
-
+        key = etag_key("render", payload)
         try:
-            response = requests.post(url, headers=HEADERS, data=json.dumps(payload))
-
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                except json.JSONDecodeError:
-                    print(f"    ❌ /render (font: {font_name_for_file}) did not return valid JSON.")
-                    continue
-
-                if "image_base64" in data and data["image_base64"]:
-                    print(f"    ✅ /render (font: {font_name_for_file}) returned a successful response.")
-                    save_files('render', timestamp, data, suffix=font_name_for_file)
-                else:
-                    print(f"    ❌ /render (font: {font_name_for_file}) response is missing 'image_base64'.")
-            elif response.status_code == 401:
-                print(f"    ❌ /render (font: {font_name_for_file}) returned 401 Unauthorized.")
-            else:
-                print(f"    ❌ /render (font: {font_name_for_file}) failed with status code {response.status_code}.")
-                print(f"       Response: {response.text[:200]}...")
-
+            return font_name_for_file, key, conditional_post(url, payload, key)
         except requests.exceptions.RequestException as e:
-            print(f"    ❌ Could not connect to the API at {url}.")
-            print(f"       Error: {e}")
-            print("       Is the Docker container running?")
+            return font_name_for_file, key, e
+
+    # 3フォント分のリクエストは独立しているため並行に送信する
+    with ThreadPoolExecutor(max_workers=len(fonts_to_test)) as executor:
+        results = list(executor.map(run_font, fonts_to_test))
+
+    # 出力順序を保つため、結果の確認と保存はメインスレッドで順に行う
+    for font_name_for_file, key, response in results:
+        log(f"  - Testing with font: {font_name_for_file}")
+
+        if isinstance(response, requests.exceptions.RequestException):
+            log(f"    ❌ Could not connect to the API at {url}.")
+            log(f"       Error: {response}")
+            log("       Is the Docker container running?")
             break # APIに接続できない場合はループを中断
 
+        if response.status_code == 304:
+            log(f"    ✅ /render (font: {font_name_for_file}) not modified; reusing {ETAGS[key]['json']}")
+        elif response.status_code == 200:
+            try:
+                data = json_loads(response.content)
+            except json.JSONDecodeError:
+                log(f"    ❌ /render (font: {font_name_for_file}) did not return valid JSON.")
+                continue
+
+            if "image_base64" in data and data["image_base64"]:
+                log(f"    ✅ /render (font: {font_name_for_file}) returned a successful response.")
+                json_path = save_files('render', timestamp, data, response.content, suffix=font_name_for_file)
+                remember_etag(key, response, json_path)
+            else:
+                log(f"    ❌ /render (font: {font_name_for_file}) response is missing 'image_base64'.")
+        elif response.status_code == 401:
+            log(f"    ❌ /render (font: {font_name_for_file}) returned 401 Unauthorized.")
+        else:
+            log(f"    ❌ /render (font: {font_name_for_file}) failed with status code {response.status_code}.")
+            log(f"       Response: {response.text[:200]}...")
+
 def check_batch_render_endpoint(timestamp):
     """/render/batch エンドポイントの動作をチェックします。"""
-    print("\nChecking POST /render/batch endpoint...")
-    url = f"{BASE_URL}/render/batch"
+    log("\nChecking POST /render/batch endpoint...")
+    url = BATCH_URL
     payload = {
         "defaults": {"font": "gothic", "font_size": 20},
         "items": [
@@ -107,35 +309,38 @@ def check_batch_render_endpoint(timestamp):
     }
 
     try:
-        response = requests.post(url, headers=HEADERS, data=json.dumps(payload))
+        response = SESSION.post(url, data=json_dumps(payload), timeout=TIMEOUT)
 
         if response.status_code == 200:
             try:
-                data = response.json()
+                data = json_loads(response.content)
             except json.JSONDecodeError:
-                print("❌ /render/batch endpoint did not return valid JSON.")
+                log("❌ /render/batch endpoint did not return valid JSON.")
                 return
 
             if "results" in data and isinstance(data["results"], list) and len(data["results"]) == 2:
-                print("✅ /render/batch endpoint returned a successful response.")
-                save_files('batch', timestamp, data)
+                log("✅ /render/batch endpoint returned a successful response.")
+                save_files('batch', timestamp, data, response.content)
             else:
-                print("❌ /render/batch endpoint response is malformed.")
+                log("❌ /render/batch endpoint response is malformed.")
         elif response.status_code == 401:
-            print("❌ /render/batch endpoint returned 401 Unauthorized.")
+            log("❌ /render/batch endpoint returned 401 Unauthorized.")
         else:
-            print(f"❌ /render/batch endpoint failed with status code {response.status_code}.")
-            print(f"   Response: {response.text[:200]}...")
+            log(f"❌ /render/batch endpoint failed with status code {response.status_code}.")
+            log(f"   Response: {response.text[:200]}...")
 
     except requests.exceptions.RequestException as e:
-        print(f"❌ Could not connect to the API at {url}.")
-        print(f"   Error: {e}")
+        log(f"❌ Could not connect to the API at {url}.")
+        log(f"   Error: {e}")
 
 
 def check_linewrapping_cases(timestamp):
-    """/render の行長制御（文字数指定あり/なし）の確認を行います。"""
-    print("\nChecking line wrapping behavior (with/without max_chars_per_line)...")
-    url = f"{BASE_URL}/render"
+    """行長制御（文字数指定あり/なし）の確認を行います。
+
+    比較する2ケースは1回の /render/batch にまとめて送信する。
+    """
+    log("\nChecking line wrapping behavior (with/without max_chars_per_line)...")
+    url = BATCH_URL
 
     # 十分な長さのサンプル文章
     sample_text = (
@@ -145,64 +350,106 @@ def check_linewrapping_cases(timestamp):
         "同じ文章で、指定ありと指定なしを比較します。"
     )
 
-    def _request_and_log(payload: dict, label: str, suffix: str):
-        try:
-            resp = requests.post(url, headers=HEADERS, data=json.dumps(payload))
-            if resp.status_code == 200:
-                data = resp.json()
-                print(
-                    f"✅ /render {label} | size: {data.get('width')}x{data.get('height')}"
-                )
-                save_files("render", timestamp, data, suffix=suffix)
-            elif resp.status_code == 401:
-                print("❌ /render returned 401 Unauthorized.")
-            else:
-                print(f"❌ /render {label} failed: {resp.status_code}")
-                print(f"   Response: {resp.text[:200]}...")
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Could not connect to the API at {url}.")
-            print(f"   Error: {e}")
-
-    # 1) 文字数指定あり
     specified_limit = 7
-    payload_with_limit = {
-        "text": sample_text,
-        "font_size": 22,
-        "padding": 20,
-        "max_chars_per_line": specified_limit,
+    cases = [
+        # 1) 文字数指定あり
+        (
+            {"text": sample_text, "max_chars_per_line": specified_limit},
+            f"with max_chars_per_line={specified_limit} ok",
+            f"with_limit_{specified_limit}",
+        ),
+        # 2) 文字数指定なし（自動: 総文字数の平方根に最も近い自然数）
+        ({"text": sample_text}, "without limit ok (auto)", "auto_limit"),
+    ]
+    payload = {
+        "defaults": BASE_RENDER_PAYLOAD,
+        "items": [item for item, _, _ in cases],
     }
-    _request_and_log(
-        payload_with_limit,
-        label=f"with max_chars_per_line={specified_limit} ok",
-        suffix=f"with_limit_{specified_limit}",
-    )
 
-    # 2) 文字数指定なし（自動: 総文字数の平方根に最も近い自然数）
-    payload_auto = {
-        "text": sample_text,
-        "font_size": 22,
-        "padding": 20,
-    }
-    _request_and_log(
-        payload_auto,
-        label="without limit ok (auto)",
-        suffix="auto_limit",
+    try:
+        resp = SESSION.post(url, data=json_dumps(payload), timeout=TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        log(f"❌ Could not connect to the API at {url}.")
+        log(f"   Error: {e}")
+        return
+
+    if resp.status_code == 401:
+        log("❌ /render/batch returned 401 Unauthorized.")
+        return
+    if resp.status_code != 200:
+        log(f"❌ /render/batch line wrapping failed: {resp.status_code}")
+        log(f"   Response: {resp.text[:200]}...")
+        return
+
+    try:
+        data = json_loads(resp.content)
+    except json.JSONDecodeError:
+        log("❌ /render/batch line wrapping did not return valid JSON.")
+        return
+
+    results = data.get("results") if isinstance(data, dict) else None
+    if not isinstance(results, list):
+        results = []
+    if len(results) != len(cases):
+        log("❌ /render/batch line wrapping response is malformed.")
+        return
+
+    for (_, label, _), result in zip(cases, results):
+        if result.get("error"):
+            log(f"❌ /render/batch {label} failed: {result['error']}")
+        else:
+            log(
+                f"✅ /render/batch {label} | size: {result.get('width')}x{result.get('height')}"
+            )
+    save_files(
+        "batch",
+        timestamp,
+        data,
+        resp.content,
+        suffix="linewrap",
+        item_suffixes=[suffix for _, _, suffix in cases],
     )
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="APIの動作確認を行います。")
+    parser.add_argument(
+        "--use-etags",
+        action="store_true",
+        help="前回のETagで条件付きリクエストを送り、変化が無ければ保存済みの結果を再利用する",
+    )
+    USE_ETAGS = parser.parse_args().use_etags
+
     print("--- API Operation Check Start ---")
 
     # 出力ディレクトリを作成
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    load_etags()
 
     # 実行日時を取得
     timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
 
     # No API_TOKEN required for internal service usage.
 
-    check_render_endpoint(timestamp_str)
-    check_batch_render_endpoint(timestamp_str)
-    check_linewrapping_cases(timestamp_str)
+    # 各チェックは互いに独立しているため、共有セッションで並行して実行する
+    checks = (
+        check_render_endpoint,
+        check_batch_render_endpoint,
+        check_linewrapping_cases,
+    )
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = [
+            executor.submit(run_check_buffered, check, timestamp_str)
+            for check in checks
+        ]
+        # 各チェックの出力は完了後にまとめて、チェックの順序どおりに書き出す
+        for future in futures:
+            sys.stdout.write(future.result())
+
+    # 書き込み待ちのPNGをすべてフラッシュ
+    IO_POOL.shutdown(wait=True)
+    print()
+    report_png_writes()
+    store_etags()
 
     print("\n--- API Operation Check End ---")
@@ -1,28 +1,41 @@
 """HTMLベース日本語縦書きAPI - Playwrightで高品質な縦書きレンダリング"""
 
 import asyncio
-import base64
+import binascii
+import hashlib
+import hmac
 import html
 import io
+import itertools
 import logging
 import logging.handlers
 import math
 import os
 import re
+import tempfile
 import time
-import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from string import Template
 from typing import Dict, List, Optional, Tuple
 
 import budoux
-from fastapi import FastAPI, HTTPException, Request
+import numpy as np
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import HTMLResponse, JSONResponse
 from PIL import Image
 from pydantic import BaseModel, Field, validator
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では標準の json にフォールバック
+    orjson = None
+
 
 # ログ設定（エラーのみ記録、1日でローテーション）
 def setup_error_only_logging():
@@ -75,11 +88,57 @@ app = FastAPI(title="HTMLベース日本語縦書きAPI")
 
 # This service is internal. No external API token is required.
 
-# 同時実行数の制限（高負荷時のメモリピーク抑制）
-MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "2"))
-_convert_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+def _cpu_count() -> int:
+    """このプロセスが実際に使えるCPU数（CPU affinity を反映。取得できない環境は os.cpu_count）"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 2
+
+
+# 1ワーカーあたりのページ（BrowserContext）数。従来通り MAX_CONCURRENCY 指定時はそれに合わせる。
+# どちらも未指定なら使用可能な CPU 数をワーカー数で割った値（最低2）とし、総ページ数≒CPU数にする
+_DEFAULT_PAGE_POOL_SIZE = max(
+    2, _cpu_count() // max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+)
+PAGE_POOL_SIZE = int(
+    os.getenv("PAGE_POOL_SIZE", os.getenv("MAX_CONCURRENCY", str(_DEFAULT_PAGE_POOL_SIZE)))
+)
+# 1つのページ（BrowserContext）を使い回す最大回数。既定の1はリクエスト毎に新しいコンテキスト
+PAGE_MAX_USES = max(1, int(os.getenv("PAGE_MAX_USES", "1")))
+# 起動する Chromium の数（PW_CDP_ENDPOINT 使用時は無視）。ページは各ブラウザへ順番に割り当てる
+BROWSER_POOL_SIZE = max(1, int(os.getenv("BROWSER_POOL_SIZE", "1")))
+# 変換処理の同時受け入れ数。ページ数はプール側で制限されるため、ここを同値にすると
+# 二重のゲートになり待ちが増える。既定はプールの2倍とし、ページを唯一の律速資源にする
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", str(PAGE_POOL_SIZE * 2)))
 # バッチ処理の最大アイテム数（環境変数で上書き可能）
 MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "50"))
+# 本文処理結果（改行・縦中横・寸法推定）のキャッシュ件数と、対象にする最大文字数
+HTML_CACHE_SIZE = int(os.getenv("HTML_CACHE_SIZE", "512"))
+HTML_CACHE_MAX_TEXT = int(os.getenv("HTML_CACHE_MAX_TEXT", "4096"))
+# PNG保存時のzlib圧縮レベル（0-9）。optimize=True は遅いため低レベルを既定にする
+PNG_COMPRESS_LEVEL = min(9, max(0, int(os.getenv("PNG_COMPRESS_LEVEL", "1"))))
+# スクリーンショットを本文テキストの範囲（+マージン）に切り出す
+SCREENSHOT_CLIP_TO_TEXT = os.getenv("SCREENSHOT_CLIP_TO_TEXT", "1") not in (
+    "0",
+    "false",
+    "False",
+)
+SCREENSHOT_CLIP_MARGIN = int(os.getenv("SCREENSHOT_CLIP_MARGIN", "16"))
+# 画素単位の余白トリミング（Pillow）。0 にするとブラウザ側の切り出し結果をそのまま返す
+PIXEL_TRIM = os.getenv("PIXEL_TRIM", "1") not in ("0", "false", "False")
+# トリミング・PNGエンコード用のスレッド。同時に処理し得るのはページ数までなので同数とする
+_IMAGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=PAGE_POOL_SIZE, thread_name_prefix="image"
+)
+# HTMLを set_content ではなく一時ファイル経由（page.goto file://）で読み込む。
+# フォント埋め込みで数MBになる文字列をCDPのJSONで送らずに済む。ブラウザと同じホストでのみ有効
+# （PW_CDP_ENDPOINT で別ホストのブラウザに接続している場合は使えない）
+LOAD_HTML_VIA_FILE = os.getenv("LOAD_HTML_VIA_FILE", "0") not in ("0", "false", "False")
+# バリデーションエラー時にログへ出すリクエストボディの最大バイト数
+LOG_BODY_MAX_BYTES = int(os.getenv("LOG_BODY_MAX_BYTES", "4096"))
+# 管理用エンドポイント（キャッシュ破棄・同時実行数変更）の Bearer トークン。未設定ならそれらは 404
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
 
 # フォント関連の定義
 DEFAULT_FONT_PATH = Path("fonts/GenEiAntiqueNv5-M.ttf")
@@ -98,67 +157,206 @@ FONT_CANDIDATES = [
 MAX_FONT_BASE64_SIZE = int(os.getenv("MAX_FONT_BASE64_SIZE", "40000000"))
 
 
+class AdmissionController:
+    """同時実行数を制御するゲート（上限は実行中に安全に変更可能）
+
+    asyncio.Semaphore は内部状態を書き換えずに上限を変えられないため、
+    実行中カウンタを Condition で保護して述語待ちする。
+    """
+
+    def __init__(self, limit: int):
+        self._active = 0
+        self._limit = max(1, limit)
+        self._cond = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+
+    async def release(self) -> None:
+        # ロック待ちの間にキャンセルされても枠が失われないよう、先に同期的に減らす
+        self._active -= 1
+        # 通知は shield し、呼び出し側がキャンセルされても待機中のタスクを起こす
+        await asyncio.shield(self._notify_one())
+
+    async def _notify_one(self) -> None:
+        async with self._cond:
+            self._cond.notify(1)
+
+    async def set_limit(self, limit: int) -> None:
+        """上限を変更し、待機中のタスクに再判定させる"""
+        async with self._cond:
+            self._limit = max(1, limit)
+            self._cond.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+
+admission = AdmissionController(MAX_CONCURRENCY)
+
+
 # ---------- Persistent Playwright browser and page pool ----------
 class PagePool:
-    def __init__(self, browser, capacity: int = 2):
-        self.browser = browser
+    """BrowserContext 単位のページプール
+
+    リクエストごとに新しい BrowserContext + Page を払い出し、返却時に
+    コンテキストごと破棄する（リクエスト間で状態を持ち越さない）。
+    容量分のコンテキストを事前作成してキューに置き、返却後にバックグラウンドで補充する。
+    払い出したページのコンテキストは `page.context` で参照できる。
+    複数のブラウザを渡すと、コンテキストを作成するたびに順番に割り当てる。
+    `max_uses` を2以上にすると、正常に使い終えたページは破棄せずその回数まで再利用する
+    （コンテキスト作成のCDP往復を省く代わりに、リクエスト間の分離は弱まる）。
+    """
+
+    def __init__(
+        self,
+        browsers,
+        capacity: int = 2,
+        warmup_html: Optional[str] = None,
+        max_uses: int = 1,
+    ):
+        self.browsers = list(browsers)
+        self._browser_cycle = itertools.cycle(self.browsers)
         self.capacity = max(1, capacity)
+        # 指定時は作成直後のページで一度描画し、フォントを読み込ませてからキューに置く
+        self.warmup_html = warmup_html
         self._queue: asyncio.Queue = asyncio.Queue()
-        self._created = 0
-        self._lock = asyncio.Lock()
-
-    async def _create_page(self):
-        page = await self.browser.new_page(viewport={"width": 10, "height": 10})
+        # 同時に貸し出すコンテキスト数の上限
+        self._slots = asyncio.Semaphore(self.capacity)
+        # 生存中（待機・貸出・作成中）のコンテキスト数
+        self._live = 0
+        self._refill_tasks: set = set()
+        self.max_uses = max(1, max_uses)
+        # 再利用中のページの使用回数
+        self._uses: dict = {}
+
+    async def _create_page(self, warm: bool = True):
+        browser = next(self._browser_cycle)
+        context = await browser.new_context(viewport={"width": 10, "height": 10})
+        page = await context.new_page()
         page.set_default_navigation_timeout(30_000)
+        if warm and self.warmup_html:
+            try:
+                await page.set_content(self.warmup_html, wait_until="commit")
+                # 本番の描画と同じくレイアウトを強制してからフォント読み込みを待つ
+                # （commit 直後に fonts.ready だけを待つと @font-face の読み込み前に解決してしまう）
+                await page.evaluate(_PREPARE_AND_MEASURE_JS)
+            except Exception:
+                # 温め失敗でもページ自体は利用できる
+                logger.warning("Failed to warm playwright page", exc_info=True)
         return page
 
     async def precreate(self):
-        """容量までページを事前作成し、キューに投入してウォーム状態にする"""
-        async with self._lock:
-            to_create = max(0, self.capacity - self._created)
-            for _ in range(to_create):
-                try:
-                    page = await self._create_page()
-                    await self._queue.put(page)
-                    self._created += 1
-                except Exception:
-                    # 1つでも失敗してもサービスは続行
-                    logger.warning("Failed to precreate playwright page", exc_info=True)
+        """容量までコンテキストを事前作成し、キューに投入してウォーム状態にする"""
+        while self._live < self.capacity:
+            self._live += 1
+            try:
+                page = await self._create_page()
+            except Exception:
+                # 1つでも失敗してもサービスは続行
+                self._live -= 1
+                logger.warning("Failed to precreate playwright context", exc_info=True)
+                return
+            self._queue.put_nowait(page)
 
     async def acquire(self):
+        await self._slots.acquire()
         try:
-            page = self._queue.get_nowait()
-            return page
+            return self._queue.get_nowait()
         except asyncio.QueueEmpty:
             pass
-        async with self._lock:
-            if self._created < self.capacity:
-                self._created += 1
-                return await self._create_page()
-        page = await self._queue.get()
-        return page
+        self._live += 1
+        try:
+            # 呼び出し元のリクエストを待たせているため、ここでは温めない
+            return await self._create_page(warm=False)
+        except Exception:
+            self._live -= 1
+            self._slots.release()
+            raise
+
+    async def release(self, page, reusable: bool = True):
+        """ページを返却する。`reusable=False`（描画失敗時など）なら必ず破棄する"""
+        uses = self._uses.pop(page, 0) + 1
+        if reusable and uses < self.max_uses:
+            # 空き枠を返す前にキューへ戻し、次の acquire にそのまま渡す
+            self._uses[page] = uses
+            self._queue.put_nowait(page)
+            self._slots.release()
+            return
+        self._slots.release()
+        try:
+            await page.context.close()
+        except Exception:
+            logger.warning("Failed to close playwright context", exc_info=True)
+        finally:
+            self._live -= 1
+        self._schedule_refill()
+
+    def _schedule_refill(self) -> None:
+        """使い終えたコンテキストの代わりを、次のリクエストの前に用意しておく"""
+        if self._live >= self.capacity:
+            return
+        self._live += 1
+        task = asyncio.create_task(self._refill())
+        self._refill_tasks.add(task)
+        task.add_done_callback(self._refill_tasks.discard)
 
-    async def release(self, page):
+    async def _refill(self) -> None:
         try:
-            await page.goto("about:blank")
+            page = await self._create_page()
         except Exception:
+            self._live -= 1
+            logger.warning("Failed to refill playwright context", exc_info=True)
+            return
+        self._queue.put_nowait(page)
+
+    async def close(self) -> None:
+        """補充を止め、待機中のコンテキストをすべて破棄する"""
+        for task in list(self._refill_tasks):
+            task.cancel()
+        self._uses.clear()
+        while not self._queue.empty():
+            page = self._queue.get_nowait()
             try:
-                new_page = await self._create_page()
-                await self._queue.put(new_page)
-                return
+                await page.context.close()
             except Exception:
                 pass
-        await self._queue.put(page)
 
 
 class BrowserManager:
     _playwright = None
     _browser = None
+    # BROWSER_POOL_SIZE > 1 のとき追加で起動したブラウザ
+    _extra_browsers: Optional[list] = None
     _pool: Optional[PagePool] = None
     _init_lock = asyncio.Lock()
 
     @classmethod
-    async def start(cls, pool_size: int):
+    async def _launch_browser(cls):
+        return await cls._playwright.chromium.launch(
+            headless=True,
+            args=[
+                "--no-sandbox",
+                "--disable-dev-shm-usage",
+            ],
+        )
+
+    @classmethod
+    async def start(cls, pool_size: int, warmup_html: Optional[str] = None):
         if cls._browser is not None and cls._pool is not None:
             return
         async with cls._init_lock:
@@ -166,15 +364,26 @@ class BrowserManager:
                 from playwright.async_api import async_playwright
 
                 cls._playwright = await async_playwright().start()
-                cls._browser = await cls._playwright.chromium.launch(
-                    headless=True,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-dev-shm-usage",
-                    ],
-                )
+                cdp_endpoint = os.getenv("PW_CDP_ENDPOINT")
+                if cdp_endpoint:
+                    # 外部で起動済みの Chromium をワーカー間で共有する
+                    cls._browser = await cls._playwright.chromium.connect_over_cdp(
+                        cdp_endpoint,
+                    )
+                else:
+                    cls._browser = await cls._launch_browser()
+                    # スクリーンショットはブラウザ単位で直列化されるため、必要なら複数起動する
+                    cls._extra_browsers = [
+                        await cls._launch_browser()
+                        for _ in range(BROWSER_POOL_SIZE - 1)
+                    ]
             if cls._pool is None:
-                cls._pool = PagePool(cls._browser, capacity=max(1, pool_size))
+                cls._pool = PagePool(
+                    [cls._browser, *(cls._extra_browsers or ())],
+                    capacity=max(1, pool_size),
+                    warmup_html=warmup_html,
+                    max_uses=PAGE_MAX_USES,
+                )
                 # ページの事前作成（高スループット向け）
                 try:
                     precreate = os.getenv("PRECREATE_PAGES", "1") not in (
@@ -190,23 +399,23 @@ class BrowserManager:
     @classmethod
     async def get_pool(cls) -> PagePool:
         if cls._pool is None:
-            pool_size = int(os.getenv("PAGE_POOL_SIZE", str(MAX_CONCURRENCY)))
-            await cls.start(pool_size)
+            await cls.start(PAGE_POOL_SIZE)
         return cls._pool  # type: ignore
 
     @classmethod
     async def shutdown(cls):
         try:
             if cls._pool is not None:
-                while not cls._pool._queue.empty():
-                    page = await cls._pool._queue.get()
-                    try:
-                        await page.close()
-                    except Exception:
-                        pass
+                await cls._pool.close()
                 cls._pool = None
         finally:
             try:
+                for browser in cls._extra_browsers or ():
+                    try:
+                        await browser.close()
+                    except Exception:
+                        logger.warning("Failed to close browser", exc_info=True)
+                cls._extra_browsers = None
                 if cls._browser is not None:
                     await cls._browser.close()
             finally:
@@ -267,12 +476,40 @@ class ErrorResponse(BaseModel):
     errors: Optional[list] = Field(default=None, description="詳細エラー（任意）")
 
 
+_cid_counter = itertools.count()
+
+
+def _gen_correlation_id() -> str:
+    """内部追跡用の相関IDを生成（時刻 + 単調増加カウンタ、乱数は不要）"""
+    return f"{time.time_ns():016x}{next(_cid_counter):08x}"
+
+
 def _get_correlation_id(request: Request) -> str:
     """ヘッダから相関IDを取得。無ければ生成。"""
-    return (
-        request.headers.get("X-Correlation-ID")
-        or request.headers.get("X-Correlation-Id")
-        or uuid.uuid4().hex
+    # Starlette の Headers は大文字小文字を区別しないため1回の参照で足りる
+    return request.headers.get("x-correlation-id") or _gen_correlation_id()
+
+
+class OrjsonResponse(JSONResponse):
+    """orjson でシリアライズする JSONResponse（未導入なら標準の json を使用）"""
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # 64bitを超える整数など orjson が扱えない値（例: バリデーションエラーの input）は標準の json に任せる
+            return super().render(content)
+
+
+def _model_json_response(model: BaseModel, *, status_code: int, headers: dict) -> Response:
+    """モデルを pydantic のシリアライザで直接JSONバイト列にして返す（dict を経由しない）"""
+    return Response(
+        content=model.model_dump_json(by_alias=True),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
     )
 
 
@@ -291,11 +528,7 @@ def _error_json_response(
     headers = {"X-Correlation-ID": cid}
     if extra_headers:
         headers.update(extra_headers)
-    return JSONResponse(
-        status_code=status_code,
-        content=body.model_dump(by_alias=True),
-        headers=headers,
-    )
+    return _model_json_response(body, status_code=status_code, headers=headers)
 
 
 # Authentication is not required for this internal service. The previous
@@ -311,18 +544,24 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         body = await request.body()
     except Exception:
         body = b""
+    # 巨大なボディを丸ごとデコードしないよう、ログには先頭のみ出す
+    body_for_log = body[:LOG_BODY_MAX_BYTES].decode("utf-8", errors="ignore")
+    if len(body) > LOG_BODY_MAX_BYTES:
+        body_for_log += f"...(truncated, {len(body)} bytes)"
+    # errors() は呼ぶたびにエラー一覧を組み立て直すため1回だけ取得する
+    errors = exc.errors()
     logger.error(
         f"[VALIDATION_ERROR] Validation failed | "
         f"CID: {cid} | "
         f"Path: {request.url!s} | "
-        f"Errors: {exc.errors()!s} | "
-        f"Body: {body.decode('utf-8', errors='ignore')}",
+        f"Errors: {errors!s} | "
+        f"Body: {body_for_log}",
     )
     headers = {"X-Correlation-ID": cid}
 
     # JSON直列化可能な形式にエラーを変換
     safe_errors = []
-    for error in exc.errors():
+    for error in errors:
         safe_error = {}
         # 基本的なフィールドのみコピー
         safe_error["type"] = error.get("type", "")
@@ -346,7 +585,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         "errors": safe_errors,
     }
 
-    return JSONResponse(
+    return OrjsonResponse(
         status_code=422,
         content=response_content,
         headers=headers,
@@ -386,11 +625,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         headers.update(exc.headers)
 
     payload = ErrorResponse(code=code, message=message, correlationId=cid)
-    return JSONResponse(
-        status_code=status,
-        content=payload.model_dump(by_alias=True),
-        headers=headers,
-    )
+    return _model_json_response(payload, status_code=status, headers=headers)
 
 
 @app.exception_handler(Exception)
@@ -406,10 +641,8 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
         message="Internal server error",
         correlationId=cid,
     )
-    return JSONResponse(
-        status_code=500,
-        content=payload.model_dump(by_alias=True),
-        headers={"X-Correlation-ID": cid},
+    return _model_json_response(
+        payload, status_code=500, headers={"X-Correlation-ID": cid}
     )
 
 
@@ -440,6 +673,10 @@ class VerticalTextRequest(BaseModel):
         le=100,
         description="1行あたりの最大文字数（BudouXで自動改行）",
     )
+    include_image: bool = Field(
+        default=True,
+        description="false の場合 image_base64 を空文字で返す（寸法などのメタデータのみ必要な場合）",
+    )
 
     @validator("text")
     def text_not_empty(cls, v):
@@ -522,21 +759,288 @@ class BatchRenderResponse(BaseModel):
     results: List[BatchRenderItemResult]
 
 
+# 実行中に設定できる同時実行数の上限（ページ数はプール側で制限されるため、これ以上は意味がない）
+MAX_ADMISSION_LIMIT = max(256, MAX_CONCURRENCY)
+
+
+class ConcurrencyLimitRequest(BaseModel):
+    limit: int = Field(
+        ..., ge=1, le=MAX_ADMISSION_LIMIT, description="同時実行数の上限"
+    )
+
+
+# 縦書きテキスト処理用の事前コンパイル済みパターン
+# 2桁数字を縦中横にする（前後が数字でない1〜2桁のみ、3桁以上は除外）
+_TCY_RE = re.compile(r"(?<!\d)(\d{1,2})(?!\d)")
+# 棒状記号（ダーシ・罫線など）で縦組時に回転定義がないものを水平バーで描画
+# 対象:
+#  – (U+2013 EN DASH)
+#  — (U+2014 EM DASH)
+#  ― (U+2015 HORIZONTAL BAR)
+#  − (U+2212 MINUS SIGN)
+#  － (U+FF0D FULLWIDTH HYPHEN-MINUS)
+#  ─ (U+2500 BOX DRAWINGS LIGHT HORIZONTAL)
+#  ━ (U+2501 BOX DRAWINGS HEAVY HORIZONTAL)
+#  ⎯ (U+23AF HORIZONTAL LINE EXTENSION)
+#  ⸺ (U+2E3A TWO-EM DASH)
+#  ⸻ (U+2E3B THREE-EM DASH)
+# 注意: 長音記号「ー」(U+30FC) は含めない
+_ROT_DASH_CHARS = "–—―−－─━⎯⸺⸻"
+_ROT_DASH_RE = re.compile(f"([{re.escape(_ROT_DASH_CHARS)}]+)")
+_ROT_DASH_MAP = {ch: f'<span class="rotate-90">{ch}</span>' for ch in _ROT_DASH_CHARS}
+
+
+def _dash_to_rotate(m: re.Match) -> str:
+    """縦組み対応していない棒状記号を1文字ずつ90度回転spanで包む"""
+    return "".join(_ROT_DASH_MAP[ch] for ch in m.group(1))
+
+
+# 行頭に来てはいけない文字（行頭禁則）
+_LINE_HEAD_FORBIDDEN = frozenset({"、", "。", "」", "〟", "っ", "ッ", "ｯ"})
+
+# この文節数未満では NumPy 化のオーバーヘッドの方が大きいため従来のループを使う
+_VECTORIZED_PACKING_MIN_CHUNKS = 32
+
+
+def _pack_chunks_vectorized(chunks: List[str], max_chars_per_line: int) -> List[str]:
+    """文節を1行の最大文字数まで貪欲に詰める（累積和 + searchsorted 版）
+
+    最大文字数を超える文節は先に分割しておき、各行の終端を累積和上の二分探索で求める。
+    結果は `_apply_budoux_line_breaks` の逐次ループと同一。
+    """
+    pieces: List[str] = []
+    for chunk in chunks:
+        if len(chunk) > max_chars_per_line:
+            pieces.extend(
+                chunk[i : i + max_chars_per_line]
+                for i in range(0, len(chunk), max_chars_per_line)
+            )
+        else:
+            pieces.append(chunk)
+
+    lengths = np.fromiter((len(p) for p in pieces), dtype=np.int64, count=len(pieces))
+    # prefix[i] = pieces[:i] の合計文字数
+    prefix = np.zeros(len(pieces) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=prefix[1:])
+
+    lines: List[str] = []
+    start = 0
+    count = len(pieces)
+    while start < count:
+        end = int(
+            np.searchsorted(prefix, prefix[start] + max_chars_per_line, side="right"),
+        ) - 1
+        # 各文節は最大文字数以下なので少なくとも1つは載る
+        end = max(end, start + 1)
+        lines.append("".join(pieces[start:end]))
+        start = end
+    return lines
+
+
+_BUDOUX_PARSER = None
+
+
+def _get_budoux_parser():
+    """BudouXの日本語パーサーを遅延生成して共有する"""
+    global _BUDOUX_PARSER
+    if _BUDOUX_PARSER is None:
+        _BUDOUX_PARSER = budoux.load_default_japanese_parser()
+    return _BUDOUX_PARSER
+
+
+# Tategaki.js 使用時に埋め込む読み込みタグと初期化スクリプト
+_TATEGAKI_SCRIPT_SRC = "https://unpkg.com/tategaki/dist/tategaki.min.js"
+# インデントは従来の生成HTMLと同一（出力をバイト単位で一致させる）
+_TATEGAKI_IMPORTS = """
+            <link rel="stylesheet" href="https://unpkg.com/tategaki/assets/tategaki.css">
+            <script src="https://unpkg.com/tategaki/dist/tategaki.min.js"></script>
+            """
+_TATEGAKI_SCRIPT = """
+            <script>
+                // Tategaki.jsの初期化
+                document.addEventListener('DOMContentLoaded', function() {
+                    new Tategaki('.vertical-text-content');
+                });
+            </script>
+            """
+
+# 縦書きHTMLのテンプレート（CSSは固定文字列。$ プレースホルダのみ差し替える）
+_HTML_TEMPLATE = Template(
+    """
+<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    $tategaki_imports
+    <style>
+        $font_face
+
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+
+        body {
+            /* 予測値は下限として扱い、コンテンツが増えたら自動で拡張 */
+            min-width: ${width}px;
+            min-height: ${height}px;
+            background: transparent;
+            /* コンテンツが推定を超える場合に切れないようにする */
+            overflow: visible;
+        }
+
+        .vertical-text-container {
+            /* コンテンツに合わせてサイズが決まるようにする */
+            display: inline-block;
+            width: auto;
+            height: auto;
+            padding: ${padding}px;
+            background: transparent;
+        }
+
+        .vertical-text-content {
+            writing-mode: vertical-rl;
+            text-orientation: mixed;
+            font-family: 'VerticalTextFont', 'Noto Sans CJK JP', 'Hiragino Kaku Gothic ProN', 'Yu Gothic', sans-serif;
+            font-size: ${font_size}px;
+            line-height: ${line_height};
+            letter-spacing: ${letter_spacing}em;
+            /* コンテンツの自然な大きさを尊重 */
+            display: inline-block;
+            width: auto;
+            /* 折返し（列生成）を促すために高さを固定 */
+            height: ${height}px;
+            color: #000;
+            overflow: visible;
+            word-break: normal;
+            text-align: start;
+            /* 空白と改行を保持し、自動折り返しを無効化 */
+            white-space: pre;
+        }
+
+        /* 縦中横（tate-chu-yoko） */
+        .tcy {
+            text-combine-upright: all;
+            -webkit-text-combine: horizontal;
+            -ms-text-combine-horizontal: all;
+            text-orientation: upright;
+            display: inline-block;
+            vertical-align: middle;
+            margin-top: -0.1em;
+        }
+
+        /* 縦組で回転が定義されていない棒状記号を強制回転 */
+        .rotate-90 {
+            display: inline-flex;
+            align-items: center;
+            justify-content: center;
+            width: 1em;
+            height: 1em;
+            /* 内側は横書きとして扱い、確実に90度回転させる */
+            writing-mode: horizontal-tb;
+            text-orientation: mixed;
+            /* フォントの縦字機能は無効化して形のブレを避ける */
+            font-feature-settings: 'vert' 0, 'vrt2' 0, 'vpal' 0;
+            transform: rotate(90deg);
+            transform-origin: center center;
+            line-height: 1;
+            letter-spacing: 0;
+            white-space: nowrap;
+            vertical-align: baseline;
+            /* 位置調整用の追加プロパティ */
+            position: relative;
+            top: 0.1em;  /* 微調整値（フォントにより調整が必要な場合がある） */
+        }
+
+        /* 水平バー（横線）スタイル */
+        .hbar {
+            display: inline-block;
+            width: 1em;
+            height: 2px;
+            background-color: currentColor;
+            vertical-align: middle;
+            margin: 0.2em 0;
+        }
+
+        .hbar--bold {
+            height: 3px;
+        }
+
+        /* ブラウザのデフォルトスタイルを確実にリセット */
+        br {
+            margin: 0;
+            padding: 0;
+            line-height: inherit;
+        }
+
+        /* ルビ対応 */
+        ruby {
+            ruby-position: inter-character;
+        }
+
+        rt {
+            font-size: 0.5em;
+        }
+    </style>
+</head>
+<body>
+    <div class="vertical-text-container">
+        <div class="vertical-text-content">$body</div>
+    </div>
+    $tategaki_script
+</body>
+</html>
+        """
+)
+# スタイル確定後も残るプレースホルダ（$name / ${name}）
+_TEMPLATE_FIELD_RE = re.compile(r"\$\{?(\w+)\}?")
+
+
+@lru_cache(maxsize=64)
+def _html_shell(
+    font_size: int,
+    line_height: float,
+    letter_spacing: float,
+    padding: int,
+    use_tategaki_js: bool,
+) -> Tuple[str, ...]:
+    """スタイル値を埋め込んだ縦書きHTMLの外枠を生成（結果をキャッシュ）
+
+    フォント定義・キャンバスサイズ・本文はリクエスト毎に変わるため残し、
+    その位置で分割した `(固定文字列, 名前, 固定文字列, 名前, ..., 固定文字列)` を返す。
+    """
+    shell = _HTML_TEMPLATE.safe_substitute(
+        font_size=font_size,
+        line_height=line_height,
+        letter_spacing=letter_spacing,
+        padding=padding,
+        tategaki_imports=_TATEGAKI_IMPORTS if use_tategaki_js else "",
+        tategaki_script=_TATEGAKI_SCRIPT if use_tategaki_js else "",
+    )
+    return tuple(_TEMPLATE_FIELD_RE.split(shell))
+
+
 class JapaneseVerticalHTMLGenerator:
     """HTMLとCSSで日本語縦書きを生成するクラス"""
 
     def __init__(self, font_path: Optional[str] = None):
         self.font_path = font_path or self._get_default_font_path()
-        # BudouXパーサーの初期化
-        self.budoux_parser = budoux.load_default_japanese_parser()
+        # BudouXパーサー（初回の分割時に読み込み、プロセスで共有）
+        self._budoux_parser = None
         self._font_base64_cache: Dict[str, str] = {}
+        # フォントパス -> Base64文字列長（サイズ上限チェック用）
+        self._font_base64_size: Dict[str, int] = {}
+        # フォントパス -> @font-face ブロック（Base64埋め込み済み）のキャッシュ
+        self._font_face_css_cache: Dict[str, str] = {}
+        # 本文処理結果 (processed_text, width, height) のLRUキャッシュ
+        self._layout_cache: OrderedDict[tuple, Tuple[str, str, int]] = OrderedDict()
         # 高負荷運用向け: 起動時にフォントをメモリへ先読み（環境変数で制御可能）
         try:
             preload = os.getenv("PRELOAD_FONTS", "1") not in ("0", "false", "False")
             if preload:
                 self._preload_fonts_into_memory()
-            # フォント用に一定量のメモリを確保（要求があれば）
-            self._ensure_font_memory_reserve()
         except Exception:
             # 先読み失敗は致命的ではないため握りつぶして続行
             logger.warning(
@@ -544,6 +1048,17 @@ class JapaneseVerticalHTMLGenerator:
                 exc_info=True,
             )
 
+    @property
+    def budoux_parser(self):
+        """BudouXパーサー（未設定なら共有インスタンスを遅延取得）"""
+        if self._budoux_parser is None:
+            self._budoux_parser = _get_budoux_parser()
+        return self._budoux_parser
+
+    @budoux_parser.setter
+    def budoux_parser(self, parser) -> None:
+        self._budoux_parser = parser
+
     def _preload_fonts_into_memory(self) -> None:
         """既知のフォントをBase64へ変換しプロセスのメモリにキャッシュ"""
         candidates: List[Path] = []
@@ -563,48 +1078,12 @@ class JapaneseVerticalHTMLGenerator:
                 seen.add(p_str)
                 if Path(p_str).exists():
                     # キャッシュミス時のみ実ファイルから読み込み
-                    if self._font_base64_cache.get(p_str) is None:
-                        self._encode_font_as_base64(p_str)
+                    if self._font_face_css_cache.get(p_str) is None:
+                        self._get_font_face_css(p_str)
             except Exception:
                 # ログのみ、処理継続
                 logger.warning("Failed to preload font: %s", p, exc_info=True)
 
-    def _ensure_font_memory_reserve(self) -> None:
-        """フォント用に所定のメモリを確保しておく（既存キャッシュ不足分をゼロ埋めで確保）。
-
-        環境変数 `FONT_MEMORY_RESERVE_MB`（デフォルト40）で目標確保量を指定。
-        実際のフォントBase64キャッシュの合計が不足している場合のみ差分を確保する。
-        """
-        try:
-            target_mb = int(os.getenv("FONT_MEMORY_RESERVE_MB", "40"))
-        except ValueError:
-            target_mb = 40
-        target_bytes = max(0, target_mb * 1024 * 1024)
-
-        total_cache_bytes = 0
-        try:
-            for v in self._font_base64_cache.values():
-                if isinstance(v, str) or isinstance(v, (bytes, bytearray)):
-                    total_cache_bytes += len(v)
-        except Exception:
-            pass
-
-        reserve_needed = max(0, target_bytes - total_cache_bytes)
-        try:
-            self._font_memory_reserve = (
-                bytearray(reserve_needed) if reserve_needed > 0 else b""
-            )
-            if reserve_needed > 0:
-                logger.info(
-                    "Reserved additional font memory: %s bytes (cache=%s bytes, target=%s bytes)",
-                    reserve_needed,
-                    total_cache_bytes,
-                    target_bytes,
-                )
-        except Exception:
-            # メモリ確保に失敗してもサービスは継続
-            logger.warning("Font memory reserve allocation failed", exc_info=True)
-
     def _get_default_font_path(self) -> str:
         """デフォルトフォントパスを取得"""
         for path in FONT_CANDIDATES:
@@ -617,6 +1096,10 @@ class JapaneseVerticalHTMLGenerator:
     def _apply_budoux_line_breaks(self, text: str, max_chars_per_line: int) -> str:
         """BudouXを使用して適切な位置で改行を入れる"""
         lines = text.split("\n")
+        if all(len(line) <= max_chars_per_line for line in lines):
+            # 分割不要。行頭禁則だけは明示改行に対しても従来通り適用する
+            return "\n".join(self._apply_line_head_kinsoku(lines))
+
         processed_lines = []
 
         for line in lines:
@@ -626,9 +1109,14 @@ class JapaneseVerticalHTMLGenerator:
             else:
                 # BudouXで文節に分割
                 chunks = self.budoux_parser.parse(line)
+                if len(chunks) >= _VECTORIZED_PACKING_MIN_CHUNKS:
+                    processed_lines.extend(
+                        _pack_chunks_vectorized(chunks, max_chars_per_line),
+                    )
+                    continue
 
-                # 文節を組み合わせて行を作成
-                current_line = ""
+                # 文節を組み合わせて行を作成（+= による再確保を避けリストに溜めて結合）
+                current_parts: List[str] = []
                 current_length = 0
 
                 for chunk in chunks:
@@ -636,9 +1124,9 @@ class JapaneseVerticalHTMLGenerator:
 
                     # チャンクが最大文字数を超える場合、強制的に分割（バルク処理）
                     if chunk_length > max_chars_per_line:
-                        if current_line:
-                            processed_lines.append(current_line)
-                            current_line = ""
+                        if current_parts:
+                            processed_lines.append("".join(current_parts))
+                            current_parts = []
                             current_length = 0
 
                         parts = [
@@ -653,31 +1141,34 @@ class JapaneseVerticalHTMLGenerator:
 
                     if current_length + chunk_length <= max_chars_per_line:
                         # 現在の行に追加
-                        current_line += chunk
+                        current_parts.append(chunk)
                         current_length += chunk_length
                     else:
                         # 新しい行を開始
-                        if current_line:
-                            processed_lines.append(current_line)
-                        current_line = chunk
+                        if current_parts:
+                            processed_lines.append("".join(current_parts))
+                        current_parts = [chunk]
                         current_length = chunk_length
 
                 # 最後の行を追加
-                if current_line:
-                    processed_lines.append(current_line)
+                if current_parts:
+                    processed_lines.append("".join(current_parts))
 
         processed_lines = self._apply_line_head_kinsoku(processed_lines)
         return "\n".join(processed_lines)
 
     def _apply_line_head_kinsoku(self, lines: List[str]) -> List[str]:
         """指定した記号が行頭に来ないように調整"""
-        forbidden = {"、", "。", "」", "〟", "っ", "ッ", "ｯ"}
-        adjusted = lines[:]
+        forbidden = _LINE_HEAD_FORBIDDEN
+        if not any(line[:1] in forbidden for line in lines[1:]):
+            return lines[:]
+        # 文字列の連結・スライスを繰り返すと長文で二乗オーダーになるため deque で移動する
+        adjusted = [deque(line) for line in lines]
         for i in range(1, len(adjusted)):
-            while adjusted[i] and adjusted[i][0] in forbidden:
-                adjusted[i - 1] += adjusted[i][0]
-                adjusted[i] = adjusted[i][1:]
-        return adjusted
+            current = adjusted[i]
+            while current and current[0] in forbidden:
+                adjusted[i - 1].append(current.popleft())
+        return ["".join(line) for line in adjusted]
 
     def _encode_font_as_base64(self, font_path: Optional[str] = None) -> Optional[str]:
         """フォントファイルをBase64エンコード（結果をキャッシュ）"""
@@ -690,8 +1181,9 @@ class JapaneseVerticalHTMLGenerator:
         try:
             with open(path, "rb") as f:
                 font_data = f.read()
-            encoded = base64.b64encode(font_data).decode("utf-8")
+            encoded = binascii.b2a_base64(font_data, newline=False).decode("ascii")
             self._font_base64_cache[path] = encoded
+            self._font_base64_size[path] = len(encoded)
             return encoded
         except Exception as e:
             logger.error(
@@ -708,51 +1200,16 @@ class JapaneseVerticalHTMLGenerator:
 
     def _process_text_for_vertical(self, text: str) -> str:
         """縦書き用のテキスト処理（縦中横など）"""
-        # 改行を<br>に変換
         text = self._escape_html(text)
-        lines = text.split("\n")
-
-        processed_lines = []
-        for line in lines:
-            # 2桁数字を縦中横にする（3桁以上は除外）
-            # 数字の前後が数字でない2桁の数字のみを縦中横にする
-            line = re.sub(
-                r"(?<!\d)(\d{1,2})(?!\d)",
-                r'<span class="tcy">\1</span>',
-                line,
-            )
-
-            # 三点リーダーを縦書き用の文字に置換（源暎アンチック対応）
-            # U+2026（…）をU+FE19（︙）に変換
-            line = line.replace("…", "︙")
-
-            # 棒状記号（ダーシ・罫線など）で縦組時に回転定義がないものを水平バーで描画
-            # 対象:
-            #  – (U+2013 EN DASH)
-            #  — (U+2014 EM DASH)
-            #  ― (U+2015 HORIZONTAL BAR)
-            #  − (U+2212 MINUS SIGN)
-            #  － (U+FF0D FULLWIDTH HYPHEN-MINUS)
-            #  ─ (U+2500 BOX DRAWINGS LIGHT HORIZONTAL)
-            #  ━ (U+2501 BOX DRAWINGS HEAVY HORIZONTAL)
-            #  ⎯ (U+23AF HORIZONTAL LINE EXTENSION)
-            #  ⸺ (U+2E3A TWO-EM DASH)
-            #  ⸻ (U+2E3B THREE-EM DASH)
-            # 注意: 長音記号「ー」(U+30FC) は含めない
-            rotatable_pattern = r"([–—―−－─━⎯⸺⸻]+)"
-
-            def _dash_to_rotate(m: re.Match) -> str:
-                out = []
-                for ch in m.group(1):
-                    # 縦組み対応していない棒状記号を90度回転
-                    out.append(f'<span class="rotate-90">{ch}</span>')
-                return "".join(out)
-
-            line = re.sub(rotatable_pattern, _dash_to_rotate, line)
-
-            processed_lines.append(line)
-
-        return "<br>".join(processed_lines)
+        # いずれの置換も改行をまたいでマッチしない（数字・記号の前後判定のみ）ため、
+        # 行ごとに分割せずテキスト全体へ一括で適用する
+        text = _TCY_RE.sub(r'<span class="tcy">\1</span>', text)
+        # 三点リーダーを縦書き用の文字に置換（源暎アンチック対応）
+        # U+2026（…）をU+FE19（︙）に変換
+        text = text.replace("…", "︙")
+        text = _ROT_DASH_RE.sub(_dash_to_rotate, text)
+        # 改行を<br>に変換
+        return text.replace("\n", "<br>")
 
     def _calculate_canvas_size(
         self,
@@ -763,14 +1220,14 @@ class JapaneseVerticalHTMLGenerator:
         max_chars_per_line: int,
     ) -> Tuple[int, int]:
         """テキストと行長上限からキャンバスサイズを一貫したロジックで推定"""
-        lines = text.split("\n")
-        total_chars = sum(len(line) for line in lines)
+        # 改行以外の文字数（行リストを作らずC実装の1走査で数える）
+        total_chars = len(text) - text.count("\n")
         column_width = int(font_size * line_height * 1.2)
 
         # 行の最大文字数（縦方向の最大段数）に合わせて高さを見積もり、
         # 総文字数から必要列数を算出する。
         chars_per_column = max(1, int(max_chars_per_line))
-        estimated_columns = max(1, int(math.ceil(total_chars / chars_per_column)))
+        estimated_columns = max(1, -(-total_chars // chars_per_column))
 
         estimated_height = int(
             (chars_per_column * font_size * line_height) + (padding * 2) + 50,
@@ -790,201 +1247,188 @@ class JapaneseVerticalHTMLGenerator:
             }}
             """
 
-    def create_vertical_html(
-        self,
-        text: str,
-        font_size: int = 20,
-        line_height: float = 1.6,
-        letter_spacing: float = 0.05,
-        padding: int = 20,
-        use_tategaki_js: bool = False,
-        max_chars_per_line: Optional[int] = None,
-        font_path: Optional[str] = None,
-    ) -> str:
-        """縦書きHTMLを生成"""
-        # 最大文字数が未指定なら、総文字数の平方根に最も近い自然数を採用（以後の計算でも再利用）
-        effective_max_chars = max_chars_per_line
-        if effective_max_chars is None:
-            total_chars_no_nl = len(text.replace("\n", ""))
-            effective_max_chars = max(1, round(math.sqrt(total_chars_no_nl)))
-
-        # BudouXによる自動改行処理（1回で十分）
-        text = self._apply_budoux_line_breaks(text, effective_max_chars)
+    def _get_font_face_css(self, font_path: Optional[str] = None) -> str:
+        """フォントを埋め込んだ @font-face ブロックを取得（結果をキャッシュ）"""
+        path = font_path or self.font_path
+        cached = self._font_face_css_cache.get(path)
+        if cached is not None:
+            return cached
 
         # フォントを常にBase64でエンコードして埋め込む
-        font_base64: Optional[str] = self._encode_font_as_base64(font_path)
+        font_base64: Optional[str] = self._encode_font_as_base64(path)
         # 以前は3MB以上を回避していたが、ローカルフォント（源暎系）を確実に使うため閾値を引き上げ
         # （Base64化で ~1.3x になるため、40MB まで許容）
-        if font_base64 and len(font_base64) > MAX_FONT_BASE64_SIZE:
+        font_base64_size = self._font_base64_size.get(path, 0)
+        if font_base64_size > MAX_FONT_BASE64_SIZE:
             logger.error(
                 "[FONT_EMBED_SKIPPED] Embedded font too large; falling back to system fonts | size(base64): %s bytes (limit=%s)",
-                len(font_base64),
+                font_base64_size,
                 MAX_FONT_BASE64_SIZE,
             )
             font_base64 = None
 
-        # テキスト処理
-        processed_text = self._process_text_for_vertical(text)
+        font_face = self._font_face_css(font_base64)
+        # エンコード失敗（ファイルなし等）は次回再試行できるようキャッシュしない
+        if path in self._font_base64_cache:
+            self._font_face_css_cache[path] = font_face
+        return font_face
 
-        # テキストの文字数を基に適切なサイズを一元ロジックで計算
-        estimated_width, estimated_height = self._calculate_canvas_size(
-            text=text,
-            font_size=font_size,
-            line_height=line_height,
-            padding=padding,
-            max_chars_per_line=effective_max_chars,
-        )
+    async def ensure_font_face_css(self, font_path: Optional[str] = None) -> None:
+        """未キャッシュのフォントを別スレッドで読み込み・Base64化しておく
 
-        # フォントフェイス定義（埋め込み有効時のみ）
-        font_face = self._font_face_css(font_base64)
+        数MBのフォントのエンコードでイベントループを止めないため、描画前に await する。
+        """
+        path = font_path or self.font_path
+        if path not in self._font_face_css_cache:
+            await asyncio.to_thread(self._get_font_face_css, path)
 
-        # Tategaki.jsの追加
-        tategaki_imports = ""
-        tategaki_script = ""
-        if use_tategaki_js:
-            tategaki_imports = """
-            <link rel="stylesheet" href="https://unpkg.com/tategaki/assets/tategaki.css">
-            <script src="https://unpkg.com/tategaki/dist/tategaki.min.js"></script>
-            """
-            tategaki_script = """
-            <script>
-                // Tategaki.jsの初期化
-                document.addEventListener('DOMContentLoaded', function() {
-                    new Tategaki('.vertical-text-content');
-                });
-            </script>
-            """
+    def _transform_text(
+        self, text: str, max_chars_per_line: Optional[int]
+    ) -> Tuple[str, str, int]:
+        """BudouX改行・禁則・縦中横などの本文変換（結果をキャッシュ）
 
-        # HTML生成
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="ja">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    {tategaki_imports}
-    <style>
-        {font_face}
+        変換はフォントサイズ等に依存しない純粋関数のため (text, max_chars_per_line) のみを
+        キーとし、サイズ違いのリクエスト間でも結果を共有する。長文はキャッシュしない。
+        戻り値は (改行済みテキスト, 変換後HTML断片, 実効の最大文字数)。
+        """
+        cacheable = HTML_CACHE_SIZE > 0 and len(text) <= HTML_CACHE_MAX_TEXT
+        key = (text, max_chars_per_line)
+        if cacheable:
+            cached = self._layout_cache.get(key)
+            if cached is not None:
+                self._layout_cache.move_to_end(key)
+                return cached
 
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
+        # 最大文字数が未指定なら、総文字数の平方根に最も近い自然数を採用（以後の計算でも再利用）
+        effective_max_chars = max_chars_per_line
+        if effective_max_chars is None:
+            total_chars_no_nl = len(text.replace("\n", ""))
+            # 浮動小数点を介さず round(sqrt(n)) を求める（sqrt(n) が x.5 になることはない）
+            root = math.isqrt(total_chars_no_nl)
+            if total_chars_no_nl > root * root + root:
+                root += 1
+            effective_max_chars = max(1, root)
 
-        body {{
-            /* 予測値は下限として扱い、コンテンツが増えたら自動で拡張 */
-            min-width: {estimated_width}px;
-            min-height: {estimated_height}px;
-            background: transparent;
-            /* コンテンツが推定を超える場合に切れないようにする */
-            overflow: visible;
-        }}
+        # BudouXによる自動改行処理（1回で十分）
+        broken_text = self._apply_budoux_line_breaks(text, effective_max_chars)
 
-        .vertical-text-container {{
-            /* コンテンツに合わせてサイズが決まるようにする */
-            display: inline-block;
-            width: auto;
-            height: auto;
-            padding: {padding}px;
-            background: transparent;
-        }}
+        # テキスト処理
+        processed_text = self._process_text_for_vertical(broken_text)
 
-        .vertical-text-content {{
-            writing-mode: vertical-rl;
-            text-orientation: mixed;
-            font-family: 'VerticalTextFont', 'Noto Sans CJK JP', 'Hiragino Kaku Gothic ProN', 'Yu Gothic', sans-serif;
-            font-size: {font_size}px;
-            line-height: {line_height};
-            letter-spacing: {letter_spacing}em;
-            /* コンテンツの自然な大きさを尊重 */
-            display: inline-block;
-            width: auto;
-            /* 折返し（列生成）を促すために高さを固定 */
-            height: {estimated_height}px;
-            color: #000;
-            overflow: visible;
-            word-break: normal;
-            text-align: start;
-            /* 空白と改行を保持し、自動折り返しを無効化 */
-            white-space: pre;
-        }}
+        result = (broken_text, processed_text, effective_max_chars)
+        if cacheable:
+            self._layout_cache[key] = result
+            while len(self._layout_cache) > HTML_CACHE_SIZE:
+                self._layout_cache.popitem(last=False)
+        return result
 
-        /* 縦中横（tate-chu-yoko） */
-        .tcy {{
-            text-combine-upright: all;
-            -webkit-text-combine: horizontal;
-            -ms-text-combine-horizontal: all;
-            text-orientation: upright;
-            display: inline-block;
-            vertical-align: middle;
-            margin-top: -0.1em;
-        }}
+    def _layout_text(
+        self,
+        text: str,
+        font_size: int,
+        line_height: float,
+        padding: int,
+        max_chars_per_line: Optional[int],
+    ) -> Tuple[str, int, int]:
+        """本文変換とキャンバスサイズの推定"""
+        broken_text, processed_text, effective_max_chars = self._transform_text(
+            text, max_chars_per_line
+        )
 
-        /* 縦組で回転が定義されていない棒状記号を強制回転 */
-        .rotate-90 {{
-            display: inline-flex;
-            align-items: center;
-            justify-content: center;
-            width: 1em;
-            height: 1em;
-            /* 内側は横書きとして扱い、確実に90度回転させる */
-            writing-mode: horizontal-tb;
-            text-orientation: mixed;
-            /* フォントの縦字機能は無効化して形のブレを避ける */
-            font-feature-settings: 'vert' 0, 'vrt2' 0, 'vpal' 0;
-            transform: rotate(90deg);
-            transform-origin: center center;
-            line-height: 1;
-            letter-spacing: 0;
-            white-space: nowrap;
-            vertical-align: baseline;
-            /* 位置調整用の追加プロパティ */
-            position: relative;
-            top: 0.1em;  /* 微調整値（フォントにより調整が必要な場合がある） */
-        }}
+        # テキストの文字数を基に適切なサイズを一元ロジックで計算
+        estimated_width, estimated_height = self._calculate_canvas_size(
+            text=broken_text,
+            font_size=font_size,
+            line_height=line_height,
+            padding=padding,
+            max_chars_per_line=effective_max_chars,
+        )
+        return processed_text, estimated_width, estimated_height
 
-        /* 水平バー（横線）スタイル */
-        .hbar {{
-            display: inline-block;
-            width: 1em;
-            height: 2px;
-            background-color: currentColor;
-            vertical-align: middle;
-            margin: 0.2em 0;
-        }}
+    def create_vertical_html(
+        self,
+        text: str,
+        font_size: int = 20,
+        line_height: float = 1.6,
+        letter_spacing: float = 0.05,
+        padding: int = 20,
+        use_tategaki_js: bool = False,
+        max_chars_per_line: Optional[int] = None,
+        font_path: Optional[str] = None,
+    ) -> str:
+        """縦書きHTMLを生成"""
+        processed_text, estimated_width, estimated_height = self._layout_text(
+            text,
+            font_size,
+            line_height,
+            padding,
+            max_chars_per_line,
+        )
 
-        .hbar--bold {{
-            height: 3px;
-        }}
+        # フォントフェイス定義（埋め込み有効時のみ）
+        font_face = self._get_font_face_css(font_path)
+
+        # スタイルが同じならHTMLの外枠はキャッシュを再利用し、可変部分だけ差し込む
+        shell = _html_shell(
+            font_size,
+            line_height,
+            letter_spacing,
+            padding,
+            use_tategaki_js,
+        )
+        fields = {
+            "font_face": font_face,
+            "width": str(estimated_width),
+            "height": str(estimated_height),
+            "body": processed_text,
+        }
+        html_content = "".join(
+            [fields[part] if i % 2 else part for i, part in enumerate(shell)],
+        )
 
-        /* ブラウザのデフォルトスタイルを確実にリセット */
-        br {{
-            margin: 0;
-            padding: 0;
-            line-height: inherit;
-        }}
+        return html_content
 
-        /* ルビ対応 */
-        ruby {{
-            ruby-position: inter-character;
-        }}
 
-        rt {{
-            font-size: 0.5em;
-        }}
-    </style>
-</head>
-<body>
-    <div class="vertical-text-container">
-        <div class="vertical-text-content">{processed_text}</div>
-    </div>
-    {tategaki_script}
-</body>
-</html>
-        """
+# スクリーンショット前の準備と計測（1回の page.evaluate で実行する）
+# - commit 直後はまだスタイル計算前で @font-face の読み込みが始まっておらず、
+#   document.fonts.status が 'loaded' に見えることがある。先にレイアウトを強制して
+#   読み込みを開始させてから、常に document.fonts.ready を待つ（保留が無ければ即座に解決する。
+#   wait_for_function のポーリングは使わない）
+# - 生成HTMLの要素はCSSで透明背景になっているため全要素の走査は行わず、
+#   html/body のみ明示的に透明化する（背景の除去は omit_background=True に任せる）
+# - コンテナの実寸と、本文テキストが実際に占める範囲（ページ座標）を返す
+_PREPARE_AND_MEASURE_JS = """
+async () => {
+    const container = document.querySelector('.vertical-text-container');
+    // レイアウトを強制し、本文が使うフォントの読み込みを要求させる
+    void container.scrollWidth;
+    await document.fonts.ready;
+    document.body.style.backgroundColor = 'transparent';
+    document.documentElement.style.backgroundColor = 'transparent';
+    const range = document.createRange();
+    range.selectNodeContents(container.querySelector('.vertical-text-content'));
+    const rect = range.getBoundingClientRect();
+    return {
+        width: Math.ceil(container.scrollWidth),
+        height: Math.ceil(container.scrollHeight),
+        text: {
+            x: rect.left + window.scrollX,
+            y: rect.top + window.scrollY,
+            width: rect.width,
+            height: rect.height
+        }
+    };
+}
+"""
 
-        return html_content
+
+def _write_temp_html(html_content: str) -> str:
+    """HTMLを一時ファイルに書き出してパスを返す（削除は呼び出し側）"""
+    with tempfile.NamedTemporaryFile(
+        mode="w", encoding="utf-8", suffix=".html", delete=False
+    ) as f:
+        f.write(html_content)
+        return f.name
 
 
 class HTMLToPNGConverter:
@@ -992,35 +1436,19 @@ class HTMLToPNGConverter:
 
     @staticmethod
     async def _render_on_page(page, html_content: str) -> Tuple[bytes, int, int]:
-        await page.set_content(html_content, wait_until="domcontentloaded")
-        await page.wait_for_function("() => document.fonts.ready")
-        await page.evaluate(
-            """
-            () => {
-                document.body.style.backgroundColor = 'transparent';
-                document.documentElement.style.backgroundColor = 'transparent';
-                const elements = document.querySelectorAll('*');
-                elements.forEach(el => {
-                    const computed = window.getComputedStyle(el);
-                    if (computed.backgroundColor !== 'rgba(0, 0, 0, 0)' &&
-                        computed.backgroundColor !== 'transparent') {
-                        el.style.backgroundColor = 'transparent';
-                    }
-                });
-            }
-        """,
-        )
-        dimensions = await page.evaluate(
-            """
-            () => {
-                const container = document.querySelector('.vertical-text-container');
-                return {
-                    width: Math.ceil(container.scrollWidth),
-                    height: Math.ceil(container.scrollHeight)
-                };
-            }
-        """,
-        )
+        # 外部リソースが無ければ document.write 完了時点でDOMは揃っているため commit で十分。
+        # Tategaki.js 使用時は <head> の外部スクリプトが解析を止めるので DOMContentLoaded まで待つ
+        # （読み込みタグは <head> 先頭にあり、フォント埋め込みより前の範囲だけを調べればよい）
+        if LOAD_HTML_VIA_FILE:
+            await HTMLToPNGConverter._goto_temp_file(page, html_content)
+        else:
+            needs_dom_ready = html_content.find(_TATEGAKI_SCRIPT_SRC, 0, 4096) != -1
+            await page.set_content(
+                html_content,
+                wait_until="domcontentloaded" if needs_dom_ready else "commit",
+            )
+        # フォント待ち・背景の透明化・寸法計測を1回の evaluate（CDP往復1回）で行う
+        dimensions = await page.evaluate(_PREPARE_AND_MEASURE_JS)
         # 任意の上限によってコンテンツが切れないように、実寸を採用
         actual_width = max(
             1,
@@ -1030,10 +1458,55 @@ class HTMLToPNGConverter:
             1,
             int(dimensions["height"]) if dimensions.get("height") else 1,
         )
-        locator = page.locator(".vertical-text-container")
-        screenshot_bytes = await locator.screenshot(type="png", omit_background=True)
+        clip = HTMLToPNGConverter._text_clip(dimensions.get("text"))
+        if clip is not None:
+            # 本文の範囲だけをブラウザ側で切り出し、Python側のデコード/走査量を減らす
+            screenshot_bytes = await page.screenshot(
+                type="png",
+                omit_background=True,
+                full_page=True,
+                clip=clip,
+            )
+        else:
+            locator = page.locator(".vertical-text-container")
+            screenshot_bytes = await locator.screenshot(
+                type="png",
+                omit_background=True,
+            )
         return screenshot_bytes, actual_width, actual_height
 
+    @staticmethod
+    async def _goto_temp_file(page, html_content: str) -> None:
+        """HTMLを一時ファイルに書き出し file:// で読ませる（巨大な文字列をCDPで送らない）"""
+        path = await asyncio.to_thread(_write_temp_html, html_content)
+        try:
+            # ファイルからの読み込みは解析が commit より後になるため DOMContentLoaded まで待つ
+            await page.goto(Path(path).as_uri(), wait_until="domcontentloaded")
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                logger.warning("Failed to remove temp html: %s", path, exc_info=True)
+
+    @staticmethod
+    def _text_clip(rect: Optional[dict]) -> Optional[dict]:
+        """本文範囲の矩形にマージンを付けたスクリーンショット用 clip を返す（無効なら None）"""
+        if not SCREENSHOT_CLIP_TO_TEXT or not rect:
+            return None
+        width = rect.get("width") or 0
+        height = rect.get("height") or 0
+        if width <= 0 or height <= 0:
+            return None
+        # 行ボックスとグリフのはみ出し（回転記号など）の差をマージンで吸収する
+        x = max(0, math.floor(rect["x"] - SCREENSHOT_CLIP_MARGIN))
+        y = max(0, math.floor(rect["y"] - SCREENSHOT_CLIP_MARGIN))
+        return {
+            "x": x,
+            "y": y,
+            "width": math.ceil(rect["x"] + width + SCREENSHOT_CLIP_MARGIN) - x,
+            "height": math.ceil(rect["y"] + height + SCREENSHOT_CLIP_MARGIN) - y,
+        }
+
     async def render_on_page(self, page, html_content: str) -> Tuple[bytes, int, int]:
         """公開用のラッパー。内部のプライベート実装を呼び出す。"""
         return await HTMLToPNGConverter._render_on_page(page, html_content)
@@ -1047,17 +1520,20 @@ class HTMLToPNGConverter:
 
         try:
             # 同時実行を制限しつつ、共有のページプールから取得
-            async with _convert_semaphore:
+            async with admission:
                 pool = await BrowserManager.get_pool()
                 page = await pool.acquire()
+                rendered = False
                 try:
                     (
                         screenshot_bytes,
                         actual_width,
                         actual_height,
                     ) = await HTMLToPNGConverter._render_on_page(page, html_content)
+                    rendered = True
                 finally:
-                    await pool.release(page)
+                    # 失敗したページは状態が不明なため再利用しない
+                    await pool.release(page, reusable=rendered)
 
         except Exception as e:
             logger.error(
@@ -1077,14 +1553,18 @@ class HTMLToPNGConverter:
 
 
 def trim_image(image_bytes: bytes) -> Tuple[Image.Image, bool]:
-    """画像の余白をトリミング（文字列をピッタリ囲む）"""
+    """画像の余白をトリミング（文字列をピッタリ囲む）
+
+    切り抜く余白が無い場合（内容が全面、または完全に透明）は元画像と False を返す。
+    その場合、呼び出し側は PNG を再エンコードせず元のバイト列をそのまま使える。
+    """
     try:
         img = Image.open(io.BytesIO(image_bytes))
         if img.mode != "RGBA":
             img = img.convert("RGBA")
 
         bbox = img.getbbox()
-        if bbox:
+        if bbox and bbox != (0, 0, img.width, img.height):
             trimmed = img.crop(bbox)
             return trimmed, True
         return img, False
@@ -1098,6 +1578,119 @@ def trim_image(image_bytes: bytes) -> Tuple[Image.Image, bool]:
         raise
 
 
+def _png_size(png_bytes: bytes) -> Tuple[int, int]:
+    """PNGのIHDRチャンクから (width, height) を読む"""
+    return (
+        int.from_bytes(png_bytes[16:20], "big"),
+        int.from_bytes(png_bytes[20:24], "big"),
+    )
+
+
+def encode_png(img: Image.Image) -> bytes:
+    """PIL画像をPNGバイト列へエンコード"""
+    img_byte_arr = io.BytesIO()
+    try:
+        img.save(img_byte_arr, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+        return img_byte_arr.getvalue()
+    finally:
+        img_byte_arr.close()
+
+
+def trim_and_encode(image_bytes: bytes) -> Tuple[bytes, int, int, bool]:
+    """トリミングと（必要時のみ）再エンコードを行い (png, width, height, trimmed) を返す"""
+    img, trimmed = trim_image(image_bytes)
+    try:
+        # 切り抜きが発生した場合のみ再エンコードし、それ以外はスクリーンショットをそのまま使う
+        image_data = encode_png(img) if trimmed else image_bytes
+        width, height = img.size
+    finally:
+        try:
+            img.close()
+        except Exception as e:
+            logger.warning(
+                "Failed to close image object: %s",
+                e,
+                exc_info=True,
+            )
+    return image_data, width, height, trimmed
+
+
+class RenderCache:
+    """レンダリング結果（トリミング・PNGエンコード済み）の件数・バイト数上限付きLRUキャッシュ
+
+    同一パラメータの再レンダリングで Playwright を通さずに済ませる。
+    `maxsize=0` または `max_bytes=0` で無効化。PNG単体が `max_bytes` を超える結果は保持しない。
+    イベントループ上からのみ操作する前提でロックは持たない。
+    """
+
+    def __init__(self, maxsize: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.maxsize = max(0, maxsize)
+        self.max_bytes = max(0, max_bytes)
+        self._data: OrderedDict[bytes, tuple] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        """保持しているPNGの合計バイト数"""
+        return self._bytes
+
+    def get(self, key: bytes) -> Optional[tuple]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value: tuple) -> None:
+        size = len(value[0])
+        if self.maxsize == 0 or size > self.max_bytes:
+            return
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[0])
+        self._data[key] = value
+        self._bytes += size
+        while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self._bytes -= len(evicted[0])
+
+    def clear(self) -> int:
+        """全エントリを破棄し、破棄した件数を返す"""
+        count = len(self._data)
+        self._data.clear()
+        self._bytes = 0
+        return count
+
+
+def _render_cache_key(params) -> bytes:
+    """レンダリング結果を決めるパラメータからキャッシュキーを生成"""
+    font_name, _ = resolve_font_name_and_path(params.font)
+    fields = (
+        font_name,
+        params.text,
+        params.font_size,
+        params.line_height,
+        params.letter_spacing,
+        params.padding,
+        params.use_tategaki_js,
+        params.max_chars_per_line,
+    )
+    return hashlib.blake2b(repr(fields).encode("utf-8"), digest_size=16).digest()
+
+
+try:
+    RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "256"))
+except ValueError:
+    RENDER_CACHE_SIZE = 256
+try:
+    RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+except ValueError:
+    RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+render_cache = RenderCache(RENDER_CACHE_SIZE, RENDER_CACHE_MAX_BYTES)
+
+
 # サービスクラス
 
 
@@ -1111,45 +1704,103 @@ class VerticalTextRendererService:
     ):
         self._html_gen = html_gen
         self._converter = conv
+        # 同一キーで実行中のレンダリング（同時に来た同一リクエストは1回の描画を共有する）
+        self._inflight: Dict[bytes, asyncio.Task] = {}
 
-    async def render(self, request: VerticalTextRequest) -> VerticalTextResponse:
-        font_name, font_path = resolve_font_name_and_path(request.font)
+    async def _render_image(self, params) -> Tuple[bytes, int, int, bool, str]:
+        """トリミング済みPNGと付随情報 (width, height, trimmed, font) を返す（結果をキャッシュ）
+
+        `params` は VerticalTextRequest / BatchRenderItem のどちらでもよい。
+        """
+        cache_key = _render_cache_key(params)
+        cached = render_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._render_uncached(params, cache_key))
+            self._inflight[cache_key] = task
+            task.add_done_callback(self._on_render_done(cache_key))
+        # 待機側のキャンセルで共有中の描画まで止めない
+        return await asyncio.shield(task)
+
+    def _on_render_done(self, cache_key: bytes):
+        def _done(task: asyncio.Task) -> None:
+            self._inflight.pop(cache_key, None)
+            # 待機側が全てキャンセルされた場合に未回収の例外として警告されないようにする
+            if not task.cancelled():
+                task.exception()
+
+        return _done
+
+    async def _render_uncached(
+        self, params, cache_key: bytes
+    ) -> Tuple[bytes, int, int, bool, str]:
+        font_name, font_path = resolve_font_name_and_path(params.font)
+        await self._html_gen.ensure_font_face_css(font_path)
         html_content = self._html_gen.create_vertical_html(
-            text=request.text,
-            font_size=request.font_size,
-            line_height=request.line_height,
-            letter_spacing=request.letter_spacing,
-            padding=request.padding,
-            use_tategaki_js=request.use_tategaki_js,
-            max_chars_per_line=request.max_chars_per_line,
+            text=params.text,
+            font_size=params.font_size,
+            line_height=params.line_height,
+            letter_spacing=params.letter_spacing,
+            padding=params.padding,
+            use_tategaki_js=params.use_tategaki_js,
+            max_chars_per_line=params.max_chars_per_line,
             font_path=font_path,
         )
 
+        # 同時実行数の制御とページの取得は convert_with_playwright 側で行う
         (
-            processing_time,
+            _,
             screenshot_bytes,
             _,
             _,
         ) = await self._converter.convert_with_playwright(html_content)
 
-        img, trimmed = trim_image(screenshot_bytes)
-        img_byte_arr = io.BytesIO()
-        try:
-            img.save(img_byte_arr, format="PNG", optimize=True)
-            image_data = img_byte_arr.getvalue()
-        finally:
-            try:
-                img.close()
-            except Exception as e:
-                logger.warning(
-                    "Failed to close image object: %s",
-                    e,
-                    exc_info=True,
-                )
-            img_byte_arr.close()
+        if not PIXEL_TRIM:
+            # ブラウザ側の切り出し結果をそのまま使う（PNGヘッダからサイズだけ読む）
+            width, height = _png_size(screenshot_bytes)
+            result = (screenshot_bytes, width, height, False, font_name)
+            render_cache.put(cache_key, result)
+            return result
+
+        # デコード・切り抜き・再エンコードは同期のCPU処理のため専用スレッドで行う
+        # （Pillow は処理中に GIL を解放するので、その間も他リクエストの I/O が進む）
+        image_data, width, height, trimmed = await asyncio.get_running_loop().run_in_executor(
+            _IMAGE_EXECUTOR, trim_and_encode, screenshot_bytes
+        )
+        result = (image_data, width, height, trimmed, font_name)
+        render_cache.put(cache_key, result)
+        return result
 
-        width, height = img.size
-        image_base64 = base64.b64encode(image_data).decode("utf-8")
+    async def render_png(
+        self,
+        request: VerticalTextRequest,
+    ) -> Tuple[bytes, int, int, float, bool, str]:
+        """PNGバイト列と付随情報 (width, height, processing_time_ms, trimmed, font) を返す"""
+        start_time = time.time()
+        image_data, width, height, trimmed, font_name = await self._render_image(
+            request,
+        )
+        processing_time = (time.time() - start_time) * 1000
+        return image_data, width, height, processing_time, trimmed, font_name
+
+    async def render(self, request: VerticalTextRequest) -> VerticalTextResponse:
+        (
+            image_data,
+            width,
+            height,
+            processing_time,
+            trimmed,
+            font_name,
+        ) = await self.render_png(request)
+        # 画像が不要な場合は Base64 化（と転送）を省く
+        image_base64 = (
+            binascii.b2a_base64(image_data, newline=False).decode("ascii")
+            if request.include_image
+            else ""
+        )
 
         return VerticalTextResponse(
             image_base64=image_base64,
@@ -1164,85 +1815,49 @@ class VerticalTextRendererService:
         self,
         items: List[BatchRenderItem],
     ) -> List[BatchRenderItemResult]:
-        results: List[BatchRenderItemResult] = []
+        async def _render_one_item(item: BatchRenderItem) -> BatchRenderItemResult:
+            start_time = time.time()
+            image_data, width, height, trimmed, font_name = await self._render_image(
+                item,
+            )
+            image_base64 = binascii.b2a_base64(image_data, newline=False).decode("ascii")
+            processing_time = (time.time() - start_time) * 1000
+            return BatchRenderItemResult(
+                image_base64=image_base64,
+                width=width,
+                height=height,
+                processing_time_ms=processing_time,
+                trimmed=trimmed,
+                font=font_name,
+            )
 
-        async with _convert_semaphore:
-            pool = await BrowserManager.get_pool()
+        # 全アイテムを並行に投入し、admission の上限内でページプールを使い切る
+        outcomes = await asyncio.gather(
+            *(_render_one_item(item) for item in items),
+            return_exceptions=True,
+        )
 
-            async def _render_one_item(
-                item: BatchRenderItem,
-                page,
-            ) -> BatchRenderItemResult:
-                start_time = time.time()
-                try:
-                    font_name, font_path = resolve_font_name_and_path(item.font)
-                    html_content = self._html_gen.create_vertical_html(
-                        text=item.text,
-                        font_size=item.font_size,
-                        line_height=item.line_height,
-                        letter_spacing=item.letter_spacing,
-                        padding=item.padding,
-                        use_tategaki_js=item.use_tategaki_js,
-                        max_chars_per_line=item.max_chars_per_line,
-                        font_path=font_path,
-                    )
-                    (
-                        screenshot_bytes,
-                        _,
-                        _,
-                    ) = await self._converter.render_on_page(
-                        page,
-                        html_content,
-                    )
-                    img, trimmed = trim_image(screenshot_bytes)
-                    img_byte_arr = io.BytesIO()
-                    try:
-                        img.save(img_byte_arr, format="PNG", optimize=True)
-                        image_data = img_byte_arr.getvalue()
-                    finally:
-                        try:
-                            img.close()
-                        except Exception as e:
-                            logger.warning(
-                                "Failed to close image object: %s",
-                                e,
-                                exc_info=True,
-                            )
-                        img_byte_arr.close()
-                    width, height = img.size
-                    image_base64 = base64.b64encode(image_data).decode("utf-8")
-                    processing_time = (time.time() - start_time) * 1000
-                    return BatchRenderItemResult(
-                        image_base64=image_base64,
-                        width=width,
-                        height=height,
-                        processing_time_ms=processing_time,
-                        trimmed=trimmed,
-                        font=font_name,
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"[BATCH_RENDER_ERROR] Rendering failed: {e!s} | "
-                        f"Error type: {type(e).__name__} | "
-                        f"Text length: {len(item.text)} | Font: {item.font}",
-                        exc_info=True,
-                    )
-                    return BatchRenderItemResult(
+        results: List[BatchRenderItemResult] = []
+        for item, outcome in zip(items, outcomes):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome
+                logger.error(
+                    f"[BATCH_RENDER_ERROR] Rendering failed: {outcome!s} | "
+                    f"Error type: {type(outcome).__name__} | "
+                    f"Text length: {len(item.text)} | Font: {item.font}",
+                    exc_info=outcome,
+                )
+                results.append(
+                    BatchRenderItemResult(
                         error=BatchRenderError(
                             code="RENDER_ERROR",
                             message="Rendering failed",
                         ),
-                    )
-
-            # ページをプールから取得し、アイテム間で再利用
-            page = await pool.acquire()
-            try:
-                for item in items:
-                    result = await _render_one_item(item, page)
-                    results.append(result)
-            finally:
-                await pool.release(page)
-
+                    ),
+                )
+            else:
+                results.append(outcome)
         return results
 
 
@@ -1250,6 +1865,22 @@ class VerticalTextRendererService:
 html_generator = JapaneseVerticalHTMLGenerator()
 converter = HTMLToPNGConverter()
 renderer_service = VerticalTextRendererService(html_generator, converter)
+app.state.generator = html_generator
+
+
+def _warmup_html() -> str:
+    """ウォームアップ用のごく小さい縦書きHTML（デフォルトフォント埋め込み）"""
+    _, font_path = resolve_font_name_and_path(None)
+    return html_generator.create_vertical_html(
+        text="起動確認",
+        font_size=16,
+        line_height=1.5,
+        letter_spacing=0.02,
+        padding=8,
+        use_tategaki_js=False,
+        max_chars_per_line=None,
+        font_path=font_path,
+    )
 
 
 # FastAPI lifecycle events to manage persistent browser
@@ -1262,12 +1893,19 @@ async def _on_startup():
         "True",
     ):
         return
-    try:
-        pool_size = int(os.getenv("PAGE_POOL_SIZE", str(MAX_CONCURRENCY)))
-    except ValueError:
-        pool_size = MAX_CONCURRENCY
-    await BrowserManager.start(pool_size)
-    # 軽いウォームアップ（任意）
+    # プールの各ページを作成時に温める（任意）。コンテキストを使い捨てる既定（PAGE_MAX_USES=1）では
+    # 温めたフォントを次のリクエストで使えず、埋め込みHTMLの転送が1回増えるだけなので既定では無効
+    warm_default = "1" if PAGE_MAX_USES > 1 else "0"
+    warm_pages = os.getenv("WARM_PAGE_FONTS", warm_default) not in (
+        "0",
+        "false",
+        "False",
+    )
+    await BrowserManager.start(
+        PAGE_POOL_SIZE,
+        warmup_html=_warmup_html() if warm_pages else None,
+    )
+    # 軽いウォームアップ（任意）。起動（readiness）を待たせないようバックグラウンドで流す
     try:
         do_warmup = os.getenv("WARMUP_RENDER_ON_STARTUP", "1") not in (
             "0",
@@ -1275,42 +1913,103 @@ async def _on_startup():
             "False",
         )
         if do_warmup:
-            # ごく小さいレンダリングを1回実行してJITやフォント読み込みを温める
-            font_name, font_path = resolve_font_name_and_path(None)
-            html_content = html_generator.create_vertical_html(
-                text="起動確認",
-                font_size=16,
-                line_height=1.5,
-                letter_spacing=0.02,
-                padding=8,
-                use_tategaki_js=False,
-                max_chars_per_line=None,
-                font_path=font_path,
-            )
-            try:
-                # 実画像は保持せずに単純にパイプラインを1度通す
-                await converter.convert_with_playwright(html_content)
-            except Exception:
-                logger.warning("Warmup render failed; continuing", exc_info=True)
+            global _warmup_task
+            _warmup_task = asyncio.create_task(_warmup_render())
     except Exception:
         # 起動を妨げない
         logger.warning("Warmup section failed", exc_info=True)
 
 
+# 実行中のウォームアップタスク（GCで破棄されないよう参照を保持）
+_warmup_task: Optional[asyncio.Task] = None
+
+
+async def _warmup_render():
+    """ごく小さいレンダリングを1回実行してJITやフォント読み込みを温める"""
+    try:
+        # 実画像は保持せずに単純にパイプラインを1度通す
+        await converter.convert_with_playwright(_warmup_html())
+    except Exception:
+        logger.warning("Warmup render failed; continuing", exc_info=True)
+
+
 @app.on_event("shutdown")
 async def _on_shutdown():
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
     await BrowserManager.shutdown()
 
 
+def _compute_build_id() -> str:
+    """ETagに含めるビルド識別子（明示指定が無ければ本モジュールのソースから求める）
+
+    描画ロジックの変更後に古いETagで 304 を返し続けないよう、デプロイ毎に変わる値を使う。
+    """
+    build_id = os.getenv("APP_BUILD_ID") or os.getenv("K_REVISION")
+    if build_id:
+        return build_id
+    try:
+        return hashlib.blake2b(Path(__file__).read_bytes(), digest_size=8).hexdigest()
+    except OSError:
+        return "unknown"
+
+
+_BUILD_ID = _compute_build_id()
+
+
+def _font_file_signature(font_path: Optional[str]) -> str:
+    """フォントファイルの差し替えを検知するための (mtime, size)"""
+    if not font_path:
+        return "-"
+    try:
+        st = os.stat(font_path)
+    except OSError:
+        return "-"
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _render_etag(request: VerticalTextRequest) -> str:
+    """レンダリング結果を決めるパラメータ・ビルド・フォントファイルから弱いETagを生成"""
+    font_name, font_path = resolve_font_name_and_path(request.font)
+    key = (
+        f"{_BUILD_ID}|{font_name}|{_font_file_signature(font_path)}|"
+        f"{request.model_dump_json()}"
+    ).encode()
+    return f'W/"{hashlib.blake2b(key, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダが指定ETagに一致するか判定
+
+    `*` は「何らかの表現が存在する」意味でありレンダリング結果の同一性を示さないため、
+    一致とはみなさない。
+    なお本APIの POST は副作用の無い問い合わせ（冪等）であるため、RFC 9110 が
+    非GET/HEADに求める 412 ではなく、意図的に 304 を返す。
+    """
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
 @app.post(
     "/render",
     response_model=VerticalTextResponse,
 )
-async def render_vertical_text(request: VerticalTextRequest):
+async def render_vertical_text(
+    request: VerticalTextRequest,
+    http_request: Request,
+    response: Response,
+):
     """縦書きテキストをレンダリング（認証必須）"""
     logger.info("Checking POST /render start")
+    # 同一パラメータの再要求はレンダリングせず 304 を返す
+    etag = _render_etag(request)
+    if _etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
     try:
         result = await renderer_service.render(request)
+        response.headers["ETag"] = etag
         logger.info("Checking POST /render end")
         return result
     except Exception as e:
@@ -1327,6 +2026,52 @@ async def render_vertical_text(request: VerticalTextRequest):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post(
+    "/render/raw",
+    response_class=Response,
+    responses={200: {"content": {"image/png": {}}}},
+)
+@app.post(
+    "/render.png",
+    response_class=Response,
+    responses={200: {"content": {"image/png": {}}}},
+)
+async def render_vertical_text_png(request: VerticalTextRequest, http_request: Request):
+    """縦書きテキストをレンダリングしPNGをそのまま返す（メタ情報はヘッダ）"""
+    etag = _render_etag(request)
+    if _etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        (
+            image_data,
+            width,
+            height,
+            processing_time,
+            trimmed,
+            font_name,
+        ) = await renderer_service.render_png(request)
+    except Exception as e:
+        logger.error(
+            f"[RENDER_ERROR] PNG rendering failed: {e!s} | "
+            f"Error type: {type(e).__name__} | "
+            f"Request data - text_length: {len(request.text)}, font: {request.font}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Internal server error")
+    return Response(
+        content=image_data,
+        media_type="image/png",
+        headers={
+            "ETag": etag,
+            "X-Width": str(width),
+            "X-Height": str(height),
+            "X-Processing-Ms": f"{processing_time:.1f}",
+            "X-Trimmed": "true" if trimmed else "false",
+            "X-Font": font_name,
+        },
+    )
+
+
 @app.post(
     "/render/batch",
     response_model=BatchRenderResponse,
@@ -1377,23 +2122,38 @@ async def root():
         },
         "endpoints": {
             "/render": "縦書きテキストをレンダリング（要認証）",
+            "/render.png": "縦書きテキストをPNGバイナリで返す（メタ情報はヘッダ）",
+            "/render/raw": "/render.png の別名",
             "/render/batch": "複数テキストを一括レンダリング（要認証）",
             "/debug/html": "生成されるHTMLを確認（要認証）",
             "/health": "ヘルスチェック（認証不要）",
+            "/admin/concurrency": "同時実行数の上限を変更（PUT・要管理トークン）",
+            "/cache/clear": "レンダリング結果キャッシュを破棄（POST・要管理トークン）",
         },
     "authentication": "No external bearer token required (internal service)",
     }
 
 
+# ヘルスチェック応答のキャッシュ（頻繁なプローブで毎回日時を整形しない）
+_HEALTH_CACHE_TTL = 1.0
+_health_cache: Dict[str, object] = {"body": None, "ts": 0.0}
+
+
 @app.get("/health")
 async def health_check():
     """ヘルスチェック"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "html_generator": "JapaneseVerticalHTMLGenerator",
-        "version": "6.0.0",
-    }
+    now = time.monotonic()
+    body = _health_cache["body"]
+    if body is None or now - _health_cache["ts"] >= _HEALTH_CACHE_TTL:
+        body = {
+            "status": "healthy",
+            "timestamp": datetime.now().isoformat(),
+            "html_generator": "JapaneseVerticalHTMLGenerator",
+            "version": "6.0.0",
+        }
+        _health_cache["body"] = body
+        _health_cache["ts"] = now
+    return body
 
 
 @app.get("/debug/html")
@@ -1428,6 +2188,34 @@ async def debug_html(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def require_admin(request: Request) -> None:
+    """管理用エンドポイントのゲート
+
+    ADMIN_TOKEN 未設定時はエンドポイント自体を公開しない（404）。
+    `Authorization: Bearer <ADMIN_TOKEN>` が一致しなければ 403。
+    """
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/cache/clear", dependencies=[Depends(require_admin)])
+async def clear_render_cache():
+    """レンダリング結果キャッシュを破棄する（要管理トークン）"""
+    return {"cleared": render_cache.clear()}
+
+
+@app.put("/admin/concurrency", dependencies=[Depends(require_admin)])
+async def set_concurrency_limit(request: ConcurrencyLimitRequest):
+    """レンダリングの同時実行数の上限を実行中に変更（要管理トークン）"""
+    await admission.set_limit(request.limit)
+    return {"limit": admission.limit, "active": admission.active}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,67 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+# フォントの事前Base64化は描画しないテストには不要。必要なテストでは初回使用時に遅延読み込みされる
+os.environ.setdefault("PRELOAD_FONTS", "0")
+
+import main
+
+
+@pytest.fixture(scope="session")
+def client():
+    """全テストで共有する TestClient（startup/shutdown はセッションで1回だけ）"""
+    with TestClient(main.app) as c:
+        yield c
+
+
+class FakeScreenshot:
+    """convert_with_playwright の代役。呼び出し回数と同時実行数のピークを記録する"""
+
+    def __init__(self, png: bytes, width: int, height: int, fail_on=(), delay: float = 0.0):
+        self.png = png
+        self.width = width
+        self.height = height
+        self.fail_on = set(fail_on)
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, html_content):
+        self.calls += 1
+        call_no = self.calls
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if call_no in self.fail_on:
+            raise RuntimeError("boom")
+        return 1.0, self.png, self.width, self.height
+
+
+@pytest.fixture
+def fake_screenshot(monkeypatch):
+    """スクリーンショットを固定画像に差し替え、レンダリングキャッシュを空にする
+
+    `image` はサイズのタプル（全面黒）か PIL 画像。`fail_on` に指定した呼び出し番号（1始まり）は例外を送出する。
+    """
+
+    def install(image, fail_on=(), delay: float = 0.0) -> FakeScreenshot:
+        if isinstance(image, tuple):
+            image = Image.new("RGBA", image, (0, 0, 0, 255))
+        buf = io.BytesIO()
+        image.save(buf, format="PNG")
+        fake = FakeScreenshot(buf.getvalue(), image.width, image.height, fail_on, delay)
+        monkeypatch.setattr(main.converter, "convert_with_playwright", fake)
+        main.render_cache.clear()
+        return fake
+
+    return install
@@ -1,7 +1,10 @@
 import os
 
+# テスト中にトークンは変わらないため、import 時に1度だけ組み立てる
+_AUTH_HEADER = {
+    "Authorization": f"Bearer {os.environ.get('API_TOKEN', 'your-secret-token-here')}"
+}
 
-def auth_header():
-    token = os.environ.get("API_TOKEN", "your-secret-token-here")
-    return {"Authorization": f"Bearer {token}"}
 
+def auth_header():
+    return _AUTH_HEADER
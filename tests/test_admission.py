@@ -0,0 +1,24 @@
+import asyncio
+
+import main
+
+
+def test_release_cancelled_while_waiting_for_lock_does_not_leak_slot():
+    async def scenario():
+        gate = main.AdmissionController(1)
+        await gate.acquire()
+        # 条件変数のロックを握ったまま release させ、ロック待ちの間にキャンセルする
+        async with gate._cond:
+            task = asyncio.create_task(gate.release())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.sleep(0)
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert gate.active == 0
+        await asyncio.wait_for(gate.acquire(), timeout=1)
+        assert gate.active == 1
+
+    asyncio.run(scenario())
@@ -1,12 +1,41 @@
-from fastapi.testclient import TestClient
+import asyncio
+import json
 
 import main
 
 from tests.helpers import auth_header
 
+# 上限を1件超えるバッチ本文（エンコードはモジュール読み込み時に1回だけ）
+_OVER_LIMIT_BODY = json.dumps(
+    {"items": [{"text": "a"}] * (main.MAX_BATCH_ITEMS + 1)}
+).encode("utf-8")
 
-def test_batch_items_limit():
-    client = TestClient(main.app)
-    data = {"items": [{"text": "a"} for _ in range(51)]}
-    response = client.post("/render/batch", json=data, headers=auth_header())
+
+def test_batch_items_limit(client):
+    response = client.post(
+        "/render/batch",
+        content=_OVER_LIMIT_BODY,
+        headers={**auth_header(), "Content-Type": "application/json"},
+    )
     assert response.status_code == 400
+
+
+def test_render_batch_runs_items_concurrently_and_keeps_order(fake_screenshot):
+    fake = fake_screenshot((4, 4), fail_on={2}, delay=0.01)
+    items = [main.BatchRenderItem(text=t) for t in ("一", "二", "三")]
+    results = asyncio.run(main.renderer_service.render_batch(items))
+
+    assert fake.peak == len(items)
+    assert [r.error is None for r in results] == [True, False, True]
+    assert results[1].error.code == "RENDER_ERROR"
+    assert results[0].width == 4
+
+
+def test_identical_items_share_one_render(fake_screenshot):
+    fake = fake_screenshot((4, 4), delay=0.01)
+    items = [main.BatchRenderItem(text="同時", font_size=33) for _ in range(3)]
+    results = asyncio.run(main.renderer_service.render_batch(items))
+
+    assert fake.calls == 1
+    assert all(r.error is None for r in results)
+    assert not main.renderer_service._inflight
@@ -0,0 +1,25 @@
+import random
+
+import main
+
+
+def _sequential_pack(monkeypatch, chunks, max_chars):
+    gen = main.JapaneseVerticalHTMLGenerator()
+    monkeypatch.setattr(main, "_VECTORIZED_PACKING_MIN_CHUNKS", len(chunks) + 1)
+    gen.budoux_parser = type("P", (), {"parse": staticmethod(lambda line: chunks)})()
+    # 行頭禁則の対象文字は含めないので、分割結果はそのまま比較できる
+    text = "x" * (max_chars + 1)
+    return gen._apply_budoux_line_breaks(text, max_chars).split("\n")
+
+
+def test_vectorized_packing_matches_sequential_loop(monkeypatch):
+    rng = random.Random(0)
+    alphabet = "あいうえおかきくけこ"
+    for _ in range(50):
+        max_chars = rng.randint(1, 12)
+        chunks = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 20)))
+            for _ in range(rng.randint(32, 80))
+        ]
+        expected = _sequential_pack(monkeypatch, chunks, max_chars)
+        assert main._pack_chunks_vectorized(chunks, max_chars) == expected
@@ -1,14 +1,13 @@
 import re
 
-from fastapi.testclient import TestClient
-
-import main
-
 from tests.helpers import auth_header
 
+_ROTATE_CSS_RE = re.compile(r'\.rotate-90\s*\{(.*?)\}', re.DOTALL)
+_CONTENT_RE = re.compile(r"<div class=\"vertical-text-content\">(.*?)</div>", re.S)
+_ROTATED_SPAN_RE = re.compile(r"<span class=\"rotate-90\">(.+?)</span>")
+
 
-def test_dash_rotation_in_debug_html():
-    client = TestClient(main.app)
+def test_dash_rotation_in_debug_html(client):
     text = "あの子は —— いつかナポリ湾を描きたいって言ってたんです"
     r = client.get(
         "/debug/html",
@@ -17,7 +16,7 @@ def test_dash_rotation_in_debug_html():
     )
     assert r.status_code == 200
     html = r.text
-    m = re.search(r'\.rotate-90\s*\{(.*?)\}', html, re.DOTALL)
+    m = _ROTATE_CSS_RE.search(html)
     assert m, ".rotate-90 CSS rule not found"
     style_content = m.group(1)
     assert "display: inline-flex" in style_content
@@ -29,9 +28,9 @@ def test_dash_rotation_in_debug_html():
     assert 'class="rotate-90"' in html
     # Ensure that the dash sequence within the input appears inside rotate-90 spans
     # Extract the processed content area to limit false positives
-    m = re.search(r"<div class=\"vertical-text-content\">(.*?)</div>", html, re.S)
+    m = _CONTENT_RE.search(html)
     assert m, "vertical-text-content not found"
     content = m.group(1)
     # Count rotate-90 wrapped characters
-    wrapped = re.findall(r"<span class=\"rotate-90\">(.+?)</span>", content)
+    wrapped = _ROTATED_SPAN_RE.findall(content)
     assert wrapped, "No rotated dash found"
@@ -1,12 +1,13 @@
-from fastapi.testclient import TestClient
+import base64
+
+import pytest
+from PIL import Image
 
 import main
 from tests.helpers import auth_header
 
-client = TestClient(main.app)
-
 
-def test_root():
+def test_root(client):
     r = client.get("/")
     assert r.status_code == 200
     j = r.json()
@@ -14,20 +15,132 @@ def test_root():
     assert "/render" in j.get("endpoints", {})
 
 
-def test_health():
+def test_health(client):
     r = client.get("/health")
     assert r.status_code == 200
     j = r.json()
     assert j.get("status") == "healthy"
 
 
-def test_debug_html_requires_auth():
+def test_debug_html_requires_auth(client):
     r = client.get("/debug/html")
     assert r.status_code == 401
 
 
-def test_debug_html_with_auth():
+def test_debug_html_with_auth(client):
     r = client.get("/debug/html", headers=auth_header())
     assert r.status_code == 200
     # HTML should contain the container class used by the generator
     assert "vertical-text-content" in r.text
+
+
+def test_render_not_modified_with_matching_etag(client):
+    etag = main._render_etag(main.VerticalTextRequest(text="テスト"))
+    r = client.post("/render", json={"text": "テスト"}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+
+
+def test_render_etag_tracks_build_and_ignores_wildcard(monkeypatch):
+    req = main.VerticalTextRequest(text="テスト")
+    etag = main._render_etag(req)
+    assert not main._etag_matches("*", etag)
+    monkeypatch.setattr(main, "_BUILD_ID", "other-build")
+    assert main._render_etag(req) != etag
+
+
+def test_admin_concurrency_updates_limit(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+    admin = {"Authorization": "Bearer s3cret"}
+    original = main.admission.limit
+    try:
+        assert client.put("/admin/concurrency", json={"limit": 5}).status_code == 403
+        r = client.put("/admin/concurrency", json={"limit": 5}, headers=admin)
+        assert r.status_code == 200
+        assert r.json() == {"limit": 5, "active": 0}
+        for bad in (0, main.MAX_ADMISSION_LIMIT + 1):
+            r = client.put("/admin/concurrency", json={"limit": bad}, headers=admin)
+            assert r.status_code == 422
+    finally:
+        client.put("/admin/concurrency", json={"limit": original}, headers=admin)
+
+
+@pytest.mark.parametrize("path", ["/render.png", "/render/raw"])
+def test_render_png_returns_raw_image_with_metadata_headers(client, fake_screenshot, path):
+    img = Image.new("RGBA", (10, 12), (0, 0, 0, 0))
+    img.paste((0, 0, 0, 255), (2, 1, 8, 10))
+    fake_screenshot(img)
+    r = client.post(path, json={"text": "テスト"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/png"
+    assert r.content.startswith(b"\x89PNG")
+    assert r.headers["X-Width"] == "6"
+    assert r.headers["X-Height"] == "9"
+    assert r.headers["X-Trimmed"] == "true"
+    assert r.headers["X-Font"] == "antique"
+    assert "ETag" in r.headers
+
+
+def test_render_reuses_screenshot_bytes_when_nothing_to_trim(client, fake_screenshot):
+    fake = fake_screenshot((5, 5))
+    r = client.post("/render", json={"text": "全面", "font_size": 33})
+    assert r.status_code == 200
+    j = r.json()
+    assert j["trimmed"] is False
+    assert base64.b64decode(j["image_base64"]) == fake.png
+
+
+def test_render_cache_skips_second_conversion(client, fake_screenshot):
+    fake = fake_screenshot((3, 3))
+    body = {"text": "キャッシュ", "font_size": 31}
+    first = client.post("/render", json=body)
+    second = client.post("/render", json=body)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["image_base64"] == second.json()["image_base64"]
+    assert fake.calls == 1
+    assert main.render_cache.clear() == 1
+
+
+def test_cache_clear_requires_admin_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.post("/cache/clear").status_code == 404
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/cache/clear").status_code == 403
+    wrong = {"Authorization": "Bearer nope"}
+    assert client.post("/cache/clear", headers=wrong).status_code == 403
+    ok = {"Authorization": "Bearer s3cret"}
+    main.render_cache.put(b"k", (b"", 1, 1, False, "antique"))
+    assert client.post("/cache/clear", headers=ok).json() == {"cleared": 1}
+
+
+def test_render_cache_bounds_total_bytes():
+    cache = main.RenderCache(maxsize=10, max_bytes=10)
+    cache.put(b"a", (b"x" * 4, 1, 1, False, "antique"))
+    cache.put(b"b", (b"x" * 4, 1, 1, False, "antique"))
+    cache.put(b"c", (b"x" * 4, 1, 1, False, "antique"))
+    assert cache.get(b"a") is None
+    assert len(cache) == 2 and cache.nbytes == 8
+    cache.put(b"big", (b"x" * 11, 1, 1, False, "antique"))
+    assert cache.get(b"big") is None and cache.nbytes == 8
+
+
+def test_render_can_omit_image_payload(client, fake_screenshot):
+    fake_screenshot((5, 7))
+    r = client.post("/render", json={"text": "寸法のみ", "include_image": False})
+    assert r.status_code == 200
+    j = r.json()
+    assert j["image_base64"] == ""
+    assert (j["width"], j["height"]) == (5, 7)
+
+
+@pytest.mark.parametrize(
+    "path, body",
+    [
+        ("/render", {"text": "a", "font_size": 10**30}),
+        ("/render/batch", {"items": [{"text": "a", "font_size": 10**30}]}),
+    ],
+)
+def test_validation_error_with_huge_integer_input_is_422(client, path, body):
+    r = client.post(path, json=body)
+    assert r.status_code == 422
+    assert r.json()["code"] == "VALIDATION_ERROR"
@@ -0,0 +1,52 @@
+import asyncio
+
+import main
+
+
+class _FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def new_page(self):
+        return _FakePage(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakePage:
+    def __init__(self, context):
+        self.context = context
+
+    def set_default_navigation_timeout(self, timeout):
+        pass
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    async def new_context(self, **kwargs):
+        context = _FakeContext()
+        self.contexts.append(context)
+        return context
+
+
+def test_page_reused_up_to_max_uses_and_dropped_on_failure():
+    async def scenario():
+        browser = _FakeBrowser()
+        pool = main.PagePool([browser], capacity=1, max_uses=2)
+        first = await pool.acquire()
+        await pool.release(first)
+        second = await pool.acquire()
+        assert second is first
+        await pool.release(second)
+        # 使用回数の上限に達したので破棄される
+        assert first.context.closed
+        third = await pool.acquire()
+        assert third is not first
+        await pool.release(third, reusable=False)
+        assert third.context.closed
+        await pool.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,25 @@
+import io
+
+from PIL import Image
+
+import main
+
+
+def test_text_clip_adds_margin_and_stays_on_page(monkeypatch):
+    monkeypatch.setattr(main, "SCREENSHOT_CLIP_MARGIN", 10)
+    clip = main.HTMLToPNGConverter._text_clip(
+        {"x": 5.5, "y": 30.0, "width": 100.2, "height": 40.0},
+    )
+    assert clip == {"x": 0, "y": 20, "width": 116, "height": 60}
+
+
+def test_text_clip_disabled_for_empty_rect():
+    empty = {"x": 0, "y": 0, "width": 0, "height": 0}
+    assert main.HTMLToPNGConverter._text_clip(empty) is None
+    assert main.HTMLToPNGConverter._text_clip(None) is None
+
+
+def test_png_size_reads_ihdr():
+    buf = io.BytesIO()
+    Image.new("RGBA", (37, 81)).save(buf, format="PNG")
+    assert main._png_size(buf.getvalue()) == (37, 81)